@@ -3,7 +3,18 @@ import numpy as np
 from statsmodels.tsa.arima.model import ARIMA
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 from statsmodels.tsa.holtwinters import ExponentialSmoothing
+from statsmodels.tsa.seasonal import STL
+from statsmodels.tsa.stattools import kpss
 from sklearn.metrics import mean_squared_error
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import signal
+import sys
+import threading
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -17,54 +28,276 @@ def load_data(file_path, column_name):
     data['Start Date'] = pd.to_datetime(data['Start Date'])
     return data[['Start Date', column_name]].dropna()
 
-# Find best parameters for ARIMA
-def find_best_arima_params(data, column_name, p_values, d_values, q_values):
-    best_score, best_order = float("inf"), None
+class CandidateTimeout(Exception):
+    """Raised inside a fit that exceeded its time budget."""
+
+
+def _raise_timeout(signum, frame):
+    raise CandidateTimeout()
+
+# Fit a single ARIMA (seasonal_order is None) or SARIMA candidate and return its AIC
+def fit_candidate(series, order, seasonal_order=None, timeout=None):
+    # The alarm can only be armed where signals are delivered: the main
+    # thread on platforms with SIGALRM
+    use_alarm = (timeout is not None and hasattr(signal, 'SIGALRM')
+                 and threading.current_thread() is threading.main_thread())
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        if seasonal_order is None:
+            model_fit = ARIMA(series, order=order).fit()
+        else:
+            model_fit = SARIMAX(series, order=order, seasonal_order=seasonal_order).fit(disp=False)
+        return model_fit.aic, 'ok' # type: ignore
+    except CandidateTimeout:
+        return None, 'timeout'
+    except Exception:
+        return None, 'error'
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler) # type: ignore
+
+def _candidate_key(order, seasonal_order):
+    return tuple(order), tuple(seasonal_order) if seasonal_order is not None else None
+
+def _describe(order, seasonal_order):
+    if seasonal_order is None:
+        return f'ARIMA {tuple(order)}'
+    return f'SARIMA {tuple(order)} x {tuple(seasonal_order)}'
+
+# Fingerprint of the data (dates and values) a search runs on and of its
+# settings; a recorded AIC is only reused for the same fingerprint
+def search_fingerprint(data, column_name, **settings):
+    series = data[[name for name in ('Start Date', column_name) if name in data.columns]]
+    digest = hashlib.sha1(pd.util.hash_pandas_object(series, index=True).to_numpy().tobytes())
+    digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:16]
+
+# Read the candidates already evaluated by an earlier, possibly interrupted,
+# search on the same data and settings. They are marked as reused.
+def load_search_results(results_path, fingerprint=None):
+    results = {}
+    if results_path is None or not os.path.exists(results_path):
+        return results
+    with open(results_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # The last line may have been cut off by the interruption
+                continue
+            if record.get('fingerprint') != fingerprint:
+                # Fitted on another vintage of the data or other settings
+                continue
+            results[_candidate_key(record['order'], record['seasonal_order'])] = dict(record, reused=True)
+    return results
+
+# Evaluate (order, seasonal_order) candidates, in parallel when n_jobs != 1.
+# Every result is appended to results_path as soon as it is known, and
+# candidates already recorded there with the same fingerprint are not
+# fitted again.
+def evaluate_candidates(series, candidates, n_jobs=1, results_path=None, timeout=None, fingerprint=None):
+    results = load_search_results(results_path, fingerprint)
+    todo = [c for c in dict.fromkeys(_candidate_key(*c) for c in candidates)
+            if c not in results]
+
+    log_file = None
+    if results_path is not None:
+        if os.path.dirname(results_path):
+            os.makedirs(os.path.dirname(results_path), exist_ok=True)
+        log_file = open(results_path, 'a')
+
+    def record(order, seasonal_order, aic, status):
+        entry = {'order': list(order),
+                 'seasonal_order': list(seasonal_order) if seasonal_order is not None else None,
+                 'aic': aic, 'status': status, 'fingerprint': fingerprint}
+        results[_candidate_key(order, seasonal_order)] = dict(entry, reused=False)
+        if log_file is not None:
+            log_file.write(json.dumps(entry) + '\n')
+            log_file.flush()
+        if status == 'ok':
+            print(f'{_describe(order, seasonal_order)} AIC={aic}')
+        else:
+            print(f'{_describe(order, seasonal_order)} {status}')
+
+    try:
+        if n_jobs == 1:
+            for order, seasonal_order in todo:
+                record(order, seasonal_order, *fit_candidate(series, order, seasonal_order, timeout))
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                futures = {executor.submit(fit_candidate, series, order, seasonal_order, timeout):
+                           (order, seasonal_order) for order, seasonal_order in todo}
+                for future in as_completed(futures):
+                    record(*futures[future], *future.result())
+    finally:
+        if log_file is not None:
+            log_file.close()
+
+    return {key: results[key] for key in (_candidate_key(*c) for c in candidates)}
+
+# Pick the lowest AIC among evaluated candidates and refit it
+def _best_candidate(series, results):
+    best_score, best_key = float("inf"), (None, None)
+    for key, entry in results.items():
+        if entry['status'] == 'ok' and entry['aic'] < best_score:
+            best_score, best_key = entry['aic'], key
+    best_order, best_seasonal_order = best_key
     best_model = None
-    for p in p_values:
-        for d in d_values:
-            for q in q_values:
-                try:
-                    model = ARIMA(data[column_name], order=(p, d, q))
-                    model_fit = model.fit()
-                    aic = model_fit.aic
-                    if aic < best_score:
-                        best_score, best_order = aic, (p, d, q)
-                        best_model = model_fit
-                    print(f'ARIMA {p,d,q} AIC={aic}')
-                except:
-                    continue
+    if best_order is not None:
+        if best_seasonal_order is None:
+            best_model = ARIMA(series, order=best_order).fit()
+        else:
+            best_model = SARIMAX(series, order=best_order, seasonal_order=best_seasonal_order).fit(disp=False)
+    return best_order, best_seasonal_order, best_score, best_model
+
+# Find best parameters for ARIMA
+def find_best_arima_params(data, column_name, p_values, d_values, q_values,
+                           n_jobs=1, results_path=None, timeout=None):
+    series = data[column_name]
+    candidates = [((p, d, q), None) for p, d, q in itertools.product(p_values, d_values, q_values)]
+    fingerprint = search_fingerprint(data, column_name, search='grid',
+                                     p=list(p_values), d=list(d_values), q=list(q_values))
+    results = evaluate_candidates(series, candidates, n_jobs, results_path, timeout, fingerprint)
+    best_order, _, best_score, best_model = _best_candidate(series, results)
     print(f'Best ARIMA Order: {best_order} AIC={best_score}')
     return best_order, best_model
 
 # Find best parameters for SARIMA
-def find_best_sarima_params(data, column_name, p_values, d_values, q_values, P_values, D_values, Q_values, m_values):
-    best_score, best_order, best_seasonal_order = float("inf"), None, None
-    best_model = None
-    for p in p_values:
-        for d in d_values:
-            for q in q_values:
-                for P in P_values:
-                    for D in D_values:
-                        for Q in Q_values:
-                            for m in m_values:
-                                try:
-                                    order = (p, d, q)
-                                    seasonal_order = (P, D, Q, m)
-                                    model = SARIMAX(data[column_name], order=order, seasonal_order=seasonal_order)
-                                    model_fit = model.fit()
-                                    aic = model_fit.aic # type: ignore
-                                    if aic < best_score:
-                                        best_score = aic
-                                        best_order = order
-                                        best_seasonal_order = seasonal_order
-                                        best_model = model_fit
-                                    print(f'SARIMA {order} x {seasonal_order} AIC={aic}')
-                                except:
-                                    continue
+def find_best_sarima_params(data, column_name, p_values, d_values, q_values, P_values, D_values, Q_values, m_values,
+                            n_jobs=1, results_path=None, timeout=None):
+    series = data[column_name]
+    candidates = [((p, d, q), (P, D, Q, m)) for p, d, q, P, D, Q, m in itertools.product(
+        p_values, d_values, q_values, P_values, D_values, Q_values, m_values)]
+    fingerprint = search_fingerprint(data, column_name, search='grid',
+                                     p=list(p_values), d=list(d_values), q=list(q_values),
+                                     P=list(P_values), D=list(D_values), Q=list(Q_values), m=list(m_values))
+    results = evaluate_candidates(series, candidates, n_jobs, results_path, timeout, fingerprint)
+    best_order, best_seasonal_order, best_score, best_model = _best_candidate(series, results)
     print(f'Best SARIMA Order: {best_order} x {best_seasonal_order} AIC={best_score}')
     return best_order, best_seasonal_order, best_model
 
+# Choose d: difference until the KPSS test no longer rejects stationarity
+def choose_differencing(series, max_d=2, alpha=0.05):
+    values = np.asarray(series, dtype=float)
+    for d in range(max_d):
+        p_value = kpss(values, regression='c', nlags='auto')[1]
+        if p_value >= alpha:
+            return d
+        values = np.diff(values)
+    return max_d
+
+# Choose D: seasonally difference while the seasonal strength of an STL
+# decomposition (Wang, Smith & Hyndman) is above the threshold
+def choose_seasonal_differencing(series, m, max_D=1, threshold=0.64):
+    values = np.asarray(series, dtype=float)
+    for D in range(max_D):
+        if len(values) < 2 * m:
+            return D
+        decomposition = STL(values, period=m).fit()
+        seasonal_and_resid = decomposition.seasonal + decomposition.resid
+        strength = max(0.0, 1 - np.var(decomposition.resid) / np.var(seasonal_and_resid))
+        if strength < threshold:
+            return D
+        values = values[m:] - values[:-m]
+    return max_D
+
+# Stepwise (Hyndman-Khandakar style) search over p, q, P and Q with d and D fixed.
+# Starting from a few seed orders, it moves to the best neighbouring order
+# while that improves the AIC. Each neighbourhood is one parallel batch.
+def _stepwise_search(data, column_name, d, D, m, max_p, max_q, max_P, max_Q, n_jobs, results_path, timeout):
+    series = data[column_name]
+    seasonal = m is not None
+    fingerprint = search_fingerprint(data, column_name, search='stepwise', d=d, D=D, m=m,
+                                     max_p=max_p, max_q=max_q, max_P=max_P, max_Q=max_Q)
+
+    def to_candidate(point):
+        p, q, P, Q = point
+        return (p, d, q), ((P, D, Q, m) if seasonal else None)
+
+    def in_bounds(point):
+        p, q, P, Q = point
+        return 0 <= p <= max_p and 0 <= q <= max_q and 0 <= P <= max_P and 0 <= Q <= max_Q
+
+    scores = {}
+    reused = set()
+
+    def evaluate(points):
+        points = [pt for pt in dict.fromkeys(points) if in_bounds(pt) and pt not in scores]
+        results = evaluate_candidates(series, [to_candidate(pt) for pt in points], n_jobs, results_path,
+                                      timeout, fingerprint)
+        for point in points:
+            entry = results[_candidate_key(*to_candidate(point))]
+            scores[point] = entry['aic'] if entry['status'] == 'ok' else float("inf")
+            if entry['reused']:
+                reused.add(point)
+        return points
+
+    if seasonal:
+        seeds = [(2, 2, 1, 1), (0, 0, 0, 0), (1, 0, 1, 0), (0, 1, 0, 1)]
+        moves = [(dp, dq, 0, 0) for dp, dq in itertools.product((-1, 0, 1), repeat=2) if (dp, dq) != (0, 0)]
+        moves += [(0, 0, dP, dQ) for dP, dQ in itertools.product((-1, 0, 1), repeat=2) if (dP, dQ) != (0, 0)]
+    else:
+        seeds = [(2, 2, 0, 0), (0, 0, 0, 0), (1, 0, 0, 0), (0, 1, 0, 0)]
+        moves = [(dp, dq, 0, 0) for dp, dq in itertools.product((-1, 0, 1), repeat=2) if (dp, dq) != (0, 0)]
+    seeds = [(min(p, max_p), min(q, max_q), min(P, max_P), min(Q, max_Q)) for p, q, P, Q in seeds]
+
+    evaluate(seeds)
+    current = min(scores, key=scores.get) # type: ignore
+    while True:
+        neighbours = evaluate([tuple(a + b for a, b in zip(current, move)) for move in moves])
+        if not neighbours:
+            break
+        best_neighbour = min(neighbours, key=scores.get) # type: ignore
+        if scores[best_neighbour] >= scores[current]:
+            break
+        current = best_neighbour
+
+    results = {_candidate_key(*to_candidate(pt)): {'aic': aic, 'status': 'ok' if aic < float("inf") else 'error',
+                                                   'reused': pt in reused}
+               for pt, aic in scores.items()}
+    return results
+
+# Number of candidates fitted by this search, not read back from its log
+def _count_fits(results):
+    return sum(not entry['reused'] for entry in results.values())
+
+# Find ARIMA parameters with a stepwise search instead of the full grid
+def find_stepwise_arima_params(data, column_name, max_p=4, max_d=2, max_q=2,
+                               n_jobs=1, results_path=None, timeout=None):
+    series = data[column_name]
+    d = choose_differencing(series, max_d)
+    results = _stepwise_search(data, column_name, d, None, None, max_p, max_q, 0, 0, n_jobs, results_path, timeout)
+    best_order, _, best_score, best_model = _best_candidate(series, results)
+    report = {'fits': _count_fits(results), 'reused': len(results) - _count_fits(results),
+              'grid_fits': (max_p + 1) * (max_d + 1) * (max_q + 1),
+              'order': best_order, 'aic': float(best_score)}
+    print(f'Best ARIMA Order: {best_order} AIC={best_score}')
+    print(f"Stepwise search needed {report['fits']} fits ({report['reused']} reused), "
+          f"the full grid {report['grid_fits']}")
+    return best_order, best_model, report
+
+# Find SARIMA parameters with a stepwise search instead of the full grid
+def find_stepwise_sarima_params(data, column_name, m=12, max_p=4, max_d=2, max_q=2, max_P=2, max_D=1, max_Q=2,
+                                n_jobs=1, results_path=None, timeout=None):
+    series = data[column_name]
+    D = choose_seasonal_differencing(series, m, max_D)
+    seasonally_differenced = np.asarray(series, dtype=float)
+    for _ in range(D):
+        seasonally_differenced = seasonally_differenced[m:] - seasonally_differenced[:-m]
+    d = choose_differencing(seasonally_differenced, max_d)
+    results = _stepwise_search(data, column_name, d, D, m, max_p, max_q, max_P, max_Q, n_jobs, results_path, timeout)
+    best_order, best_seasonal_order, best_score, best_model = _best_candidate(series, results)
+    report = {'fits': _count_fits(results), 'reused': len(results) - _count_fits(results),
+              'grid_fits': (max_p + 1) * (max_d + 1) * (max_q + 1) * (max_P + 1) * (max_D + 1) * (max_Q + 1),
+              'order': best_order, 'seasonal_order': best_seasonal_order, 'aic': float(best_score)}
+    print(f'Best SARIMA Order: {best_order} x {best_seasonal_order} AIC={best_score}')
+    print(f"Stepwise search needed {report['fits']} fits ({report['reused']} reused), "
+          f"the full grid {report['grid_fits']}")
+    return best_order, best_seasonal_order, best_model, report
+
 # Find best parameters for Holt-Winters (Exponential Smoothing)
 def find_best_holtwinters_params(data, column_name, seasonal_periods, trend_options, seasonal_options):
     best_score, best_params = float("inf"), None
@@ -85,8 +318,82 @@ def find_best_holtwinters_params(data, column_name, seasonal_periods, trend_opti
     print(f'Best Holt-Winters Trend: {best_params[0]} Seasonal: {best_params[1]} AIC={best_score}') # type: ignore
     return best_params, best_model
 
+# Search log of one series and model, named by the fingerprint of the data so
+# that a new release starts a new log; the logs of older releases are removed
+def search_log_path(results_dir, data, base_name, column_name, model_name):
+    prefix = f'{base_name}_{column_name}_{model_name}_'
+    path = os.path.join(results_dir, f'{prefix}{search_fingerprint(data, column_name)}.jsonl')
+    if os.path.exists(results_dir):
+        for name in os.listdir(results_dir):
+            fingerprint = name[len(prefix):-len('.jsonl')]
+            if (name.startswith(prefix) and name.endswith('.jsonl') and len(fingerprint) == 16
+                    and name != os.path.basename(path)):
+                os.remove(os.path.join(results_dir, name))
+    return path
+
+# Tune the ARIMA and SARIMA orders of one dataset/column pair with the stepwise search
+def tune_series(file_path, column_name, m=12, timeout=None, results_dir='model_params'):
+    data = load_data(file_path, column_name)
+    base_name = os.path.basename(file_path).split('.')[0]
+
+    def results_path(model_name):
+        # Per data vintage, so only an interrupted tune of the same data is resumed
+        if results_dir is None:
+            return None
+        return search_log_path(results_dir, data, base_name, column_name, model_name)
+
+    arima_order, _, arima_report = find_stepwise_arima_params(
+        data, column_name, timeout=timeout, results_path=results_path('arima'))
+    sarima_order, seasonal_order, _, sarima_report = find_stepwise_sarima_params(
+        data, column_name, m=m, timeout=timeout, results_path=results_path('sarima'))
+
+    rows = []
+    if arima_order is not None:
+        rows.append({'Dataset': base_name, 'Column': column_name, 'Model': 'arima',
+                     'order': str(arima_order), 'seasonal_order': None,
+                     'AIC': arima_report['aic'], 'Fits': arima_report['fits']})
+    if sarima_order is not None:
+        rows.append({'Dataset': base_name, 'Column': column_name, 'Model': 'sarima',
+                     'order': str(sarima_order), 'seasonal_order': str(seasonal_order),
+                     'AIC': sarima_report['aic'], 'Fits': sarima_report['fits']})
+    return rows
+
+# Tune every dataset/column pair in parallel and write the best-parameters table
+def tune_all_series(file_paths, output_file='model_params/best_parameters.csv', n_jobs=None,
+                    m=12, timeout=None, results_dir='model_params'):
+    tasks = []
+    for file_path in file_paths:
+        # Assuming first three columns are identifiers (Start Date, etc.)
+        for column_name in pd.read_csv(file_path, nrows=0).columns[3:]:
+            tasks.append((file_path, column_name))
+
+    # One series per worker; the searches inside a worker run serially
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        futures = [executor.submit(tune_series, file_path, column_name, m, timeout, results_dir)
+                   for file_path, column_name in tasks]
+        rows = [row for future in futures for row in future.result()]
+
+    if os.path.dirname(output_file):
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    best_parameters = pd.DataFrame(rows)
+    best_parameters.to_csv(output_file, index=False)
+    print(f'Best parameters of {len(tasks)} series written to {output_file}')
+    return best_parameters
+
 # Example Usage
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find the best forecasting model parameters.")
+    parser.add_argument('--all', action='store_true',
+                        help="tune every dataset/column pair and write model_params/best_parameters.csv")
+    parser.add_argument('--jobs', type=int, default=None,
+                        help="number of worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    if args.all:
+        tune_all_series(['processed/sixteen_and_over.csv', 'processed/sixteen_and_sixty_four.csv'],
+                        n_jobs=args.jobs, timeout=120)
+        sys.exit(0)
+
     # Load your dataset
     file_path = 'processed/sixteen_and_over.csv'
     column_name = 'Total in employment level'
@@ -98,8 +405,16 @@ if __name__ == "__main__":
     d_values = [0, 1, 2]
     q_values = [0, 1, 2]
     
+    # Search settings: worker processes (None = one per CPU), per-fit time
+    # budget in seconds and where completed fits are recorded for resuming
+    n_jobs = args.jobs
+    timeout = 120
+    results_dir = 'model_params'
+
     print("Finding best ARIMA parameters...")
-    best_arima_order, best_arima_model = find_best_arima_params(data, column_name, p_values, d_values, q_values)
+    best_arima_order, best_arima_model = find_best_arima_params(
+        data, column_name, p_values, d_values, q_values, n_jobs=n_jobs, timeout=timeout,
+        results_path=search_log_path(results_dir, data, 'sixteen_and_over', column_name, 'arima'))
     
     # Define SARIMA parameters ranges
     P_values = [0, 1, 2]
@@ -108,8 +423,15 @@ if __name__ == "__main__":
     m_values = [12]  # Seasonal period (e.g., 12 for monthly data)
     
     print("\nFinding best SARIMA parameters...")
-    best_sarima_order, best_seasonal_order, best_sarima_model = find_best_sarima_params(data, column_name, p_values, d_values, q_values, P_values, D_values, Q_values, m_values)
+    best_sarima_order, best_seasonal_order, best_sarima_model = find_best_sarima_params(
+        data, column_name, p_values, d_values, q_values, P_values, D_values, Q_values, m_values,
+        n_jobs=n_jobs, timeout=timeout,
+        results_path=search_log_path(results_dir, data, 'sixteen_and_over', column_name, 'sarima'))
     
+    print("\nFinding SARIMA parameters with the stepwise search...")
+    stepwise_order, stepwise_seasonal_order, stepwise_model, stepwise_report = find_stepwise_sarima_params(
+        data, column_name, m=12, n_jobs=n_jobs, timeout=timeout)
+
     # Define Holt-Winters parameters ranges
     seasonal_periods = 12  # Seasonal period (e.g., 12 for monthly data)
     trend_options = ['add', 'mul', None]  # Additive, multiplicative, or None
@@ -122,6 +444,8 @@ if __name__ == "__main__":
     print(best_arima_order)
     print("Best SARIMA parameter:")
     print(best_sarima_order, best_seasonal_order)
+    print("Best stepwise SARIMA parameter:")
+    print(stepwise_order, stepwise_seasonal_order)
     print("Best Holt-Winters parameter:")
     print(best_hw_params)
     
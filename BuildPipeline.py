@@ -0,0 +1,455 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class BuildPipeline:
+    """
+    Make-like build graph over the stages of the project.
+
+    Every node names the files it reads, the files it writes, the
+    parameters it runs with and the nodes it depends on. After a node is
+    built, the content hashes of its inputs and outputs and its parameters
+    are recorded in a state file. A node is rebuilt only when one of those
+    changed or an output is missing, so a run after a new release touches
+    only what the release actually changed. Stale nodes whose dependencies
+    are done run in parallel threads.
+
+    Attributes:
+    -----------
+    state_file : str
+        JSON file recording the last build of every node.
+    n_jobs : int
+        Maximum number of nodes built at the same time.
+    lock : threading.Lock
+        Shared by the node actions that merge results into common files.
+
+    Methods:
+    --------
+    add(name, action, inputs, outputs, params, deps):
+        Add a node to the graph.
+    stale_nodes(targets, force):
+        List the nodes a build would run.
+    run(targets, force):
+        Build the stale nodes needed by the targets.
+    """
+
+    def __init__(self, state_file='build_state.json', n_jobs=2):
+        self.state_file = state_file
+        self.n_jobs = n_jobs
+        self.lock = threading.Lock()
+        self.nodes = {}
+        self._state_lock = threading.Lock()
+        self._state = self._load_state()
+
+    def add(self, name, action, inputs=(), outputs=(), params=None, deps=()):
+        """
+        Add a node to the graph.
+
+        Parameters:
+        -----------
+        name : str
+            Unique name of the node.
+        action : callable
+            Builds the outputs; called without arguments.
+        inputs : list of str or callable
+            Files read by the node, or a function returning them.
+        outputs : list of str, dict or callable
+            Files written by the node, or a function returning them when
+            they are only known once the inputs exist. A dict maps stable
+            names to the current paths of the outputs, for outputs that
+            move, e.g. into a published results version.
+        params : dict, optional
+            JSON-serializable parameters; changing them makes the node stale.
+        deps : list of str
+            Nodes that must be built first.
+        """
+        self.nodes[name] = {'action': action, 'inputs': inputs, 'outputs': outputs,
+                            'params': params or {}, 'deps': list(deps)}
+
+    def _load_state(self):
+        if not os.path.exists(self.state_file):
+            return {'files': {}, 'nodes': {}}
+        with open(self.state_file) as f:
+            return json.load(f)
+
+    def _save_state(self):
+        tmp_path = f"{self.state_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._state, f, indent=1)
+        os.replace(tmp_path, self.state_file)
+
+    def file_hash(self, path):
+        """
+        Return the sha256 of a file, or None when it does not exist.
+
+        Hashes are remembered by modification time and size so unchanged
+        files are not read again.
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        signature = [stat.st_mtime_ns, stat.st_size]
+        with self._state_lock:
+            known = self._state['files'].get(path)
+        if known is not None and known['signature'] == signature:
+            return known['sha256']
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        with self._state_lock:
+            self._state['files'][path] = {'signature': signature, 'sha256': digest.hexdigest()}
+        return digest.hexdigest()
+
+    @staticmethod
+    def _paths(paths):
+        return list(paths()) if callable(paths) else list(paths)
+
+    @staticmethod
+    def _named(paths):
+        paths = paths() if callable(paths) else paths
+        return dict(paths) if isinstance(paths, dict) else {path: path for path in paths}
+
+    def is_stale(self, name):
+        """
+        Check whether a node must be rebuilt.
+
+        Returns:
+        --------
+        str or None
+            Why the node is stale, or None when it is up to date.
+        """
+        node = self.nodes[name]
+        with self._state_lock:
+            built = self._state['nodes'].get(name)
+        if built is None:
+            return 'never built'
+        if built['params'] != json.loads(json.dumps(node['params'])):
+            return 'parameters changed'
+        inputs = {path: self.file_hash(path) for path in self._paths(node['inputs'])}
+        if inputs != built['inputs']:
+            changed = sorted(path for path in set(inputs) | set(built['inputs'])
+                             if inputs.get(path) != built['inputs'].get(path))
+            return f"inputs changed: {', '.join(changed)}"
+        for name, path in self._named(node['outputs']).items():
+            output_hash = self.file_hash(path)
+            if output_hash is None:
+                return f"missing output: {path}"
+            if output_hash != built['outputs'].get(name):
+                return f"output modified: {path}"
+        return None
+
+    def _record(self, name):
+        node = self.nodes[name]
+        entry = {
+            'params': json.loads(json.dumps(node['params'])),
+            'inputs': {path: self.file_hash(path) for path in self._paths(node['inputs'])},
+            'outputs': {name: self.file_hash(path)
+                        for name, path in self._named(node['outputs']).items()},
+            'built': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        with self._state_lock:
+            self._state['nodes'][name] = entry
+            self._save_state()
+
+    def _select(self, targets):
+        """
+        Return the targets and everything they depend on, in build order.
+        """
+        order = []
+        visiting = set()
+
+        def visit(name):
+            if name in order:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through '{name}'")
+            if name not in self.nodes:
+                raise ValueError(f"Unknown node '{name}', expected one of {sorted(self.nodes)}")
+            visiting.add(name)
+            for dep in self.nodes[name]['deps']:
+                visit(dep)
+            visiting.discard(name)
+            order.append(name)
+
+        for target in targets or self.nodes:
+            visit(target)
+        return order
+
+    def stale_nodes(self, targets=None, force=False):
+        """
+        List the nodes a build would run, without running anything.
+
+        A node is listed when it is stale itself or depends on a listed
+        node, since rebuilding the dependency may change its inputs.
+        """
+        stale = []
+        for name in self._select(targets):
+            reason = 'forced' if force else self.is_stale(name)
+            if reason is None and any(dep in stale for dep in self.nodes[name]['deps']):
+                reason = 'dependency rebuilt'
+            if reason is not None:
+                stale.append(name)
+                print(f"{name}: {reason}")
+        return stale
+
+    def run(self, targets=None, force=False):
+        """
+        Build the stale nodes needed by the targets.
+
+        Parameters:
+        -----------
+        targets : list of str, optional
+            Nodes to bring up to date; every node by default.
+        force : bool, optional
+            Rebuild the nodes even when they are up to date.
+
+        Returns:
+        --------
+        list of str
+            The nodes that were rebuilt.
+        """
+        waiting = self._select(targets)
+        done = set()
+        rebuilt = []
+        running = {}
+        failure = None
+
+        with ThreadPoolExecutor(max_workers=self.n_jobs) as executor:
+            while waiting or running:
+                progress = True
+                while progress and failure is None:
+                    progress = False
+                    for name in list(waiting):
+                        if not all(dep in done for dep in self.nodes[name]['deps']):
+                            continue
+                        waiting.remove(name)
+                        progress = True
+                        # Checked only now, as the dependencies may have
+                        # rewritten the inputs
+                        reason = 'forced' if force else self.is_stale(name)
+                        if reason is None:
+                            print(f"{name}: up to date")
+                            done.add(name)
+                            continue
+                        print(f"{name}: building ({reason})")
+                        running[executor.submit(self.nodes[name]['action'])] = (name, time.time())
+
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name, started = running.pop(future)
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"{name}: failed after {time.time() - started:.1f}s: {e}")
+                        failure = failure or e
+                        continue
+                    self._record(name)
+                    print(f"{name}: built in {time.time() - started:.1f}s")
+                    done.add(name)
+                    rebuilt.append(name)
+
+        if failure is not None:
+            raise failure
+        return rebuilt
+
+
+def create_pipeline(n_jobs=2, fit_jobs=None, periods=60, state_file='build_state.json', model_options=None):
+    """
+    Create the graph of the project:
+
+        prep -> tune -> forecast_arima, forecast_sarima -> publish -> snapshot
+        prep -> forecast_<model> of the other models   -> publish
+
+    There is one forecast node per model, so a change to one model only
+    rebuilds its forecasts, and the models that do not use the tuned
+    orders run while the tuning does. Every node forecasts all the
+    datasets at once, so the models forecasting panels (see
+    ForecastingManager.run_panel), e.g. the global LSTM, fit all the series
+    together exactly as the forecasting command does. The nodes write into
+    a staging version of the model results (see ResultsPublisher), which
+    the publish node publishes.
+
+    Parameters:
+    -----------
+    n_jobs : int, optional
+        Maximum number of nodes built at the same time, default is 2.
+    fit_jobs : int, optional
+        Worker processes shared by the nodes built at the same time, each
+        node getting an even share, which is also the torch threads of the
+        LSTM unless set in `model_options`; None uses one per CPU.
+    periods : int, optional
+        The number of periods to forecast, default is 60.
+    state_file : str, optional
+        Where the state of the builds is recorded.
+    model_options : dict, optional
+        Keyword arguments of LabourForecastModels.model_arguments other
+        than the results directory, e.g. {'lstm_max_time': 300}.
+
+    Returns:
+    --------
+    BuildPipeline
+        The graph.
+    """
+    # Imported here so building the graph does not load the model backends
+    from LabourForecastModels import DATASETS, MODEL_REGISTRY, TUNED_MODELS, create_manager, model_arguments
+    from ResultsPublisher import ResultsPublisher
+
+    pipeline = BuildPipeline(state_file=state_file, n_jobs=n_jobs)
+    publisher = ResultsPublisher('model_results', keep=5)
+    processed = list(DATASETS.values())
+    model_sources = sorted(glob.glob('models/*.py'))
+    # The modules the forecasting run imports besides the models
+    forecast_sources = ['LabourForecastModels.py', 'FileHandler.py', 'DataSnapshot.py',
+                        'ForecastStore.py', 'TaskLedger.py', 'ForecastCache.py',
+                        'ModelStateStore.py', 'ResultsPublisher.py']
+    # The nodes running at the same time split the CPUs between them
+    node_jobs = max(1, (fit_jobs or os.cpu_count() or 1) // n_jobs)
+
+    def prep():
+        from LabourSurveyDataPrep import LabourSurveyDataPrep
+        LabourSurveyDataPrep(file_path='input/a01aug2024.xls',
+                             sheet_name='1', output_folder='processed').run()
+
+    pipeline.add('prep', prep,
+                 inputs=['input/a01aug2024.xls', 'LabourSurveyDataPrep.py'],
+                 outputs=processed,
+                 params={'sheet_name': '1'})
+
+    def tune():
+        from BestParameters import tune_all_series
+        tune_all_series(processed, n_jobs=node_jobs, timeout=120)
+
+    pipeline.add('tune', tune,
+                 inputs=processed + ['BestParameters.py'],
+                 outputs=['model_params/best_parameters.csv'],
+                 params={'m': 12, 'timeout': 120},
+                 deps=['prep'])
+
+    model_options = {'lstm_threads': node_jobs, **(model_options or {})}
+
+    def forecast(model_name):
+        def action():
+            with pipeline.lock:
+                staging = publisher.stage(resume=True)
+            manager = create_manager([model_name], output_folder=staging,
+                                     model_arguments=model_arguments(staging, **model_options))
+            # Resuming skips the tasks finished before an interrupted build
+            manager.run_forecast(processed, periods=periods, n_jobs=node_jobs,
+                                 model_concurrency={'lstm': 1}, results_lock=pipeline.lock,
+                                 resume=True)
+        return action
+
+    def forecast_outputs(model_name):
+        def outputs():
+            import pandas as pd
+            results_dir = publisher.open_staging() or publisher.current_dir()
+            named = {}
+            for dataset, file_path in DATASETS.items():
+                if not os.path.exists(file_path):
+                    continue
+                for column in pd.read_csv(file_path, nrows=0).columns[3:]:
+                    name = f"{dataset}_{model_name}_{column}_forecast.csv"
+                    named[name] = os.path.join(results_dir, name)
+            return named
+        return outputs
+
+    forecast_nodes = []
+    for model_name, entry in MODEL_REGISTRY.items():
+        tuned = model_name in TUNED_MODELS
+        # Only the arguments of this model, without the run's checkpoint path
+        arguments = model_arguments('', **model_options).get(model_name, {})
+        pipeline.add(f"forecast_{model_name}", forecast(model_name),
+                     inputs=(processed + (['model_params/best_parameters.csv'] if tuned else [])
+                             + forecast_sources + model_sources),
+                     outputs=forecast_outputs(model_name),
+                     params={'periods': periods, 'model': entry[2],
+                             'arguments': {name: value for name, value in arguments.items()
+                                           if name != 'checkpoint_path'}},
+                     deps=['tune'] if tuned else ['prep'])
+        forecast_nodes.append(f"forecast_{model_name}")
+
+    payload_decimals = int(os.environ['PAYLOAD_DECIMALS']) if 'PAYLOAD_DECIMALS' in os.environ else None
+    max_points = int(os.environ['PLOT_MAX_POINTS']) if 'PLOT_MAX_POINTS' in os.environ else None
+    snapshot_dir = os.environ.get('DATA_SNAPSHOT', 'snapshot')
+
+    def publish():
+        staging = publisher.open_staging()
+        if staging is not None:
+            publisher.publish(staging)
+
+    def staged_files():
+        staging = publisher.open_staging()
+        if staging is None:
+            return []
+        return sorted(os.path.join(staging, name) for name in os.listdir(staging)
+                      if name not in ResultsPublisher.RUN_FILES)
+
+    pipeline.add('publish', publish,
+                 inputs=staged_files,
+                 deps=forecast_nodes)
+
+    def snapshot_inputs():
+        results_dir = publisher.current_dir()
+        return processed + [os.path.join(results_dir, 'metrics_comparison.csv'),
+                            os.path.join(results_dir, 'forecasts_index.json'),
+                            'DashboardManager.py', 'PlotManager.py', 'DataSnapshot.py']
+
+    def snapshot():
+        from DashboardManager import DashboardManager
+        from DataSnapshot import DataSnapshot
+        from FileHandler import FileHandler
+        from PlotManager import PlotManager
+        file_handler = FileHandler(processed_dir='processed', model_results_dir='model_results')
+        dashboard_manager = DashboardManager(file_handler, PlotManager(),
+                                             payload_decimals=payload_decimals,
+                                             max_points=max_points)
+        DataSnapshot(snapshot_dir).build(dashboard_manager)
+
+    pipeline.add('snapshot', snapshot,
+                 inputs=snapshot_inputs,
+                 outputs=[os.path.join(snapshot_dir, 'manifest.json')],
+                 params={'payload_decimals': payload_decimals, 'max_points': max_points},
+                 deps=['publish'])
+    return pipeline
+
+
+# Example usage: python BuildPipeline.py            (bring everything up to date)
+#                python BuildPipeline.py --dry-run  (list what would be rebuilt)
+if __name__ == "__main__":
+    from LabourForecastModels import add_model_options
+
+    parser = argparse.ArgumentParser(description="Rebuild the stale artifacts of the project.")
+    parser.add_argument('targets', nargs='*',
+                        help="nodes to bring up to date (default: all)")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild the nodes even when they are up to date")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="only list the nodes that would be rebuilt")
+    parser.add_argument('--jobs', type=int, default=2,
+                        help="nodes built at the same time (default: 2)")
+    parser.add_argument('--fit-jobs', type=int, default=None,
+                        help="worker processes shared by the nodes built at the same time (default: one per CPU)")
+    add_model_options(parser)
+    args = parser.parse_args()
+
+    # Unset options keep the defaults of the pipeline
+    model_options = {'holt_winters_backend': args.holt_winters_backend,
+                     'lstm_threads': args.lstm_threads, 'lstm_max_time': args.lstm_max_time}
+    pipeline = create_pipeline(n_jobs=args.jobs, fit_jobs=args.fit_jobs,
+                               model_options={name: value for name, value in model_options.items()
+                                              if value is not None})
+    if args.dry_run:
+        pipeline.stale_nodes(args.targets, force=args.force)
+    else:
+        pipeline.run(args.targets, force=args.force)
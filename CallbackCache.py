@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Returned by the backends when a key is not cached
+MISSING = object()
+
+
+class MemoryCacheBackend:
+    """
+    In-process LRU backend; each gunicorn worker keeps its own entries.
+
+    Methods:
+    --------
+    get(key):
+        Return the cached value or MISSING.
+    set(key, value):
+        Store a value, evicting the least recently used entries.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return MISSING
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteCacheBackend:
+    """
+    Backend stored in a local SQLite file so that all gunicorn workers on
+    the host share the same entries. Values must be JSON serializable.
+
+    A hit only records its use when the entry was last used more than
+    `touch_interval` seconds ago, so that reads do not queue on the write
+    lock of the file; eviction stays least recently used to that precision.
+
+    Methods:
+    --------
+    get(key):
+        Return the cached value or MISSING.
+    set(key, value):
+        Store a value, evicting the least recently used entries.
+    """
+
+    def __init__(self, path='callback_cache.sqlite', max_entries=1024, touch_interval=60):
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)")
+
+    def _connection(self):
+        # sqlite3 connections must not cross threads or forked processes
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key):
+        connection = self._connection()
+        row = connection.execute("SELECT value, last_used FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return MISSING
+        now = time.time()
+        if now - row[1] > self.touch_interval:
+            connection.execute("UPDATE cache SET last_used = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO cache (key, value, last_used) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time()))
+        connection.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY last_used DESC "
+            "LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+
+class CallbackCache:
+    """
+    Memoize Dash callback outputs.
+
+    Entries are keyed by the function, its arguments, a version token,
+    typically the version of the published model results, so that a new
+    release invalidates every entry without any explicit flush, and the
+    options the outputs are built with, e.g. the figure format, so that a
+    persistent backend never serves entries built with other options.
+
+    Attributes:
+    -----------
+    backend : MemoryCacheBackend or SQLiteCacheBackend
+        Where the entries are stored.
+    version : callable or None
+        Returns the current version token.
+    options : dict or None
+        The options the cached outputs depend on.
+
+    Methods:
+    --------
+    memoize(func):
+        Wrap a function so that its results are served from the cache.
+    """
+
+    def __init__(self, backend=None, version=None, options=None):
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.version = version
+        self.options = options
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, func, args):
+        token = self.version() if self.version is not None else None
+        payload = json.dumps([func.__qualname__, token, self.options, list(args)], default=str, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def memoize(self, func):
+        """
+        Wrap a function so that its results are served from the cache.
+
+        Parameters:
+        -----------
+        func : callable
+            Function of hashable, JSON-friendly positional arguments.
+
+        Returns:
+        --------
+        callable
+            The memoized function.
+        """
+        def wrapper(*args):
+            key = self.make_key(func, args)
+            value = self.backend.get(key)
+            if value is not MISSING:
+                self.hits += 1
+                return value
+            self.misses += 1
+            value = func(*args)
+            self.backend.set(key, value)
+            return value
+
+        wrapper.__name__ = func.__name__
+        wrapper.__wrapped__ = func  # type: ignore
+        return wrapper
@@ -1,35 +1,141 @@
 import dash
 from dash import dcc, html, Input, Output
+import numpy as np
+from dash.exceptions import PreventUpdate
 import plotly.graph_objs as go
 import dash_bootstrap_components as dbc
 import pandas as pd
 from FileHandler import FileHandler
 from PlotManager import PlotManager
+from CallbackCache import CallbackCache
 import os
+import json
+import gzip
+import importlib.util
+import threading
+import time
+from flask import request, Response
+
+# Columns plotted on the "16 & over" and "16 to 64" pages
+RATE_COLUMNS = ['Economic activity rate', 'Employment rate',
+                'Unemployment rate', 'Economic inactivity rate']
+LEVEL_COLUMNS = ['Total economically active level', 'Total in employment level',
+                 'Unemployed level', 'Economically inactive level']
+# Identifier columns of the processed files, everything else is a series
+ID_COLUMNS = ['Start Date', 'End Date', 'Dataset identifier code']
+# Processed file of every dataset
+DATASET_FILES = {'sixteen_and_over': 'sixteen_and_over.csv',
+                 'sixteen_and_sixty_four': 'sixteen_and_sixty_four.csv'}
+DATASET_OPTIONS = [{'label': 'sixteen & over', 'value': 'sixteen_and_over'},
+                   {'label': 'sixteen to sixty four', 'value': 'sixteen_and_sixty_four'}]
+MODEL_OPTIONS = [{'label': 'Linear Regression', 'value': 'linear_regression'},
+                 {'label': 'Prophet', 'value': 'prophet'},
+                 {'label': 'XGBoost', 'value': 'xgboost'}]
+# Every model of the forecasting run, overlaid on the comparison page
+FORECAST_MODELS = ['linear_regression', 'prophet', 'arima', 'sarima',
+                   'holt_winters', 'xgboost', 'lstm']
+
+# Fetches the prebuilt levels and rates figures of a population page; the
+# server answers with JSON encoded once per data version (see
+# `setup_page_figure_route`). The URL carries the app's path prefix.
+CLIENTSIDE_PAGE_FIGURES = """
+function(pathname) {
+    if (pathname !== '%(page)s') {
+        throw window.dash_clientside.PreventUpdate;
+    }
+    return fetch('%(url)s').then(function (response) {
+        return response.json();
+    });
+}
+"""
+
+# Builds the forecast figure in the browser from the per-dataset payload;
+# mirrors PlotManager.create_plot
+CLIENTSIDE_FORECAST_FIGURE = """
+function(payload, column, model) {
+    var empty = {data: [], layout: {}};
+    if (!payload || !column || !model || !payload.series[column]) {
+        return empty;
+    }
+    var entry = payload.series[column][model];
+    if (!entry) {
+        return empty;
+    }
+    var dates = payload.axes[entry.axis].map(function (day) {
+        return new Date(day * 86400000).toISOString().slice(0, 10);
+    });
+    return {
+        data: [
+            {type: 'scatter', mode: 'lines', name: 'Actual', x: dates, y: entry.actual},
+            {type: 'scatter', mode: 'lines', name: 'Forecast', x: dates, y: entry.prediction}
+        ],
+        layout: {
+            title: {text: 'Original and Forecasted Values for ' + column},
+            xaxis: {title: {text: 'Date'}},
+            yaxis: {title: {text: column}},
+            shapes: [{type: 'line', x0: '2024-04-01', x1: '2024-04-01', y0: 0, y1: 1,
+                      xref: 'x', yref: 'paper', line: {color: 'Red', width: 2, dash: 'dash'}}]
+        }
+    };
+}
+"""
 
 class DashboardManager:
     """
     Class to manage the dashboard using Dash.
     """
 
-    def __init__(self, file_handler, plot_manager):
+    def __init__(self, file_handler, plot_manager, callback_cache=None, warm_cache=False,
+                 client_side=False, payload_decimals=None, payload_stats=False, max_points=None,
+                 started_at=None, reload_interval=None):
         self.file_handler = file_handler
         self.plot_manager = plot_manager
-
-        # Load the base files during initialization
-        self.sixteen_and_over = self.file_handler.load_file(
-            self.file_handler.processed_dir, 'sixteen_and_over.csv')
-        self.sixteen_and_sixty_four = self.file_handler.load_file(
-            self.file_handler.processed_dir, 'sixteen_and_sixty_four.csv')
+        # When set, figures are sent as rounded binary arrays (see
+        # PlotManager.compact_figure)
+        self.payload_decimals = payload_decimals
+        # In client-side mode the browser receives every forecast of the
+        # selected dataset at once and switches column and model locally
+        self.client_side = client_side
+        # Point budget per trace, about the plot width in pixels; longer
+        # series are downsampled on the server and refined on zoom
+        self.max_points = max_points
+        self.warm_cache = warm_cache
+
+        # Forecast figures are memoized per (dataset, column, model) and
+        # invalidated when new model results are written
+        self.callback_cache = callback_cache if callback_cache is not None else CallbackCache(
+            version=self.file_handler.results_version)
+        # The format of the cached figures and payloads is part of their key
+        self.callback_cache.options = self.figure_options()
+        self.forecast_figure = self.callback_cache.memoize(self.build_forecast_figure)
+        self.dataset_payload = self.callback_cache.memoize(self.build_dataset_payload)
+        self.comparison_figure = self.callback_cache.memoize(self.build_comparison_figure)
+        self.leaderboard = self.callback_cache.memoize(self.build_leaderboard)
+
+        # Everything derived from the base files is loaded once into a state
+        # that is only ever replaced as a whole (see `reload`)
+        self.state = self.load_state()
+        self.results_version_seen = self.file_handler.results_version()
 
         self.app = dash.Dash(
             __name__,
             external_stylesheets=[
                 dbc.themes.BOOTSTRAP,
                 "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0-beta3/css/all.min.css"],
-            suppress_callback_exceptions=True)
+            suppress_callback_exceptions=True,
+            # gzip/brotli responses when flask-compress is installed
+            compress=importlib.util.find_spec('flask_compress') is not None)
         
         self.server = self.app.server
+        self.payload_stats = {}
+        if payload_stats:
+            self.setup_payload_stats()
+        self.startup_stats = {}
+        self.setup_startup_timing(started_at if started_at is not None else time.time())
+        self.setup_version_pinning()
+        self.setup_page_figure_route()
+        if reload_interval:
+            self.setup_reloading(reload_interval)
         
         self.sixteen_and_sixty_four_page = html.Div(
             [
@@ -51,7 +157,42 @@ class DashboardManager:
                     id='sixteen-over-rates-plot'),
                 html.Hr(),
             ])
-        self.home_page = html.Div([
+        self.setup_layout()
+        self.setup_callbacks()
+        if warm_cache:
+            self.warm_forecast_cache()
+
+    def build_data_pages(self, column_options):
+        """
+        Build the home and comparison pages, whose column dropdowns list
+        the columns of the "16 & over" dataset.
+        """
+        compare_page = html.Div([
+            html.H3("Compare forecasting models"),
+            dbc.Row([
+                dbc.Col(html.P('Labour Age Range'), width=6),
+                dbc.Col(html.P('Category'), width=6),
+            ]),
+            dbc.Row([
+                dbc.Col(dcc.Dropdown(
+                    id='compare-base-file-dropdown',
+                    options=DATASET_OPTIONS,
+                    value='sixteen_and_over',
+                    placeholder="Select a dataset"
+                ), width=6),
+                dbc.Col(dcc.Dropdown(
+                    id='compare-column-dropdown',
+                    options=column_options,
+                    value='Total economically active level',
+                    placeholder="Select a column"
+                ), width=6),
+            ]),
+            dcc.Graph(id='compare-plot'),
+            html.H4("Model leaderboard"),
+            html.Div(id='compare-leaderboard'),
+            html.Hr(),
+        ])
+        home_page = html.Div([
             html.P("Forecasting Dashboard of Labour Market Statistics",
                    style={'font-size': '24px', 'font-weight': 'bold'}),
             dbc.Row([
@@ -62,37 +203,496 @@ class DashboardManager:
             dbc.Row([
                 dbc.Col(dcc.Dropdown(
                     id='base-file-dropdown',
-                    options=[{'label': 'sixteen & over', 
-                              'value': 'sixteen_and_over'},
-                             {'label': 'sixteen to sixty four', 
-                              'value': 'sixteen_and_sixty_four'}],
+                    options=DATASET_OPTIONS,
                     value='sixteen_and_over',  # Set default value
                     placeholder="Select a dataset"
                 ), width=4),
                 dbc.Col(dcc.Dropdown(
                     id='column-dropdown',
-                    options=[{'label': col, 'value': col
-                              } for col in self.sixteen_and_over.columns if col not in [
-                        'Start Date', 'End Date', 'Dataset identifier code']],
+                    options=column_options,
                     value='Total economically active level',  # Set first column as default
                     placeholder="Select a column"
                 ), width=4),
                 dbc.Col(dcc.Dropdown(
                     id='model-dropdown',
-                    options=[{'label': 'Linear Regression', 'value': 'linear_regression'},
-                             {'label': 'Prophet', 'value': 'prophet'},
-                             {'label': 'XGBoost', 'value': 'xgboost'}],
+                    options=MODEL_OPTIONS,
                     value='linear_regression',  # Set default forecasting model
                     placeholder="Select a forecasting model"
                 ), width=4),
             ]),
+            dcc.Store(id='dataset-payload'),
             dcc.Graph(id='forecast-plot'),
             html.Hr(),
 
 
         ])
-        self.setup_layout()
-        self.setup_callbacks()
+        return home_page, compare_page
+
+    def load_state(self):
+        """
+        Load everything derived from the base files.
+
+        The version token is read before the files, so data changing while
+        they are loaded is picked up by the next reload.
+
+        Returns:
+        --------
+        dict
+            The version token, the base frames, the forecasted columns and
+            their dropdown options, the page figures and the home and
+            comparison pages.
+        """
+        version = self.data_version()
+        frames = {dataset: self.file_handler.load_file(self.file_handler.processed_dir, filename)
+                  for dataset, filename in DATASET_FILES.items()}
+        columns = {dataset: [col for col in df.columns if col not in ID_COLUMNS]
+                   for dataset, df in frames.items()}
+        column_options = {dataset: [{'label': col, 'value': col} for col in names]
+                          for dataset, names in columns.items()}
+
+        # The page figures only depend on the base files, so they are built
+        # once instead of on every navigation, or read from the data snapshot
+        snapshot = self.file_handler.snapshot
+        figures = snapshot.page_figures(self.figure_options()) if snapshot is not None else None
+        if figures is None:
+            figures = self.build_page_figures(frames)
+
+        home_page, compare_page = self.build_data_pages(column_options['sixteen_and_over'])
+        return {
+            'version': version,
+            'frames': frames,
+            'columns': columns,
+            'column_options': column_options,
+            'page_figures': figures,
+            'page_figures_json': {pathname: f"[{','.join(json.dumps(figure) for figure in page)}]".encode()
+                                  for pathname, page in figures.items()},
+            'home_page': home_page,
+            'compare_page': compare_page,
+        }
+
+    @property
+    def sixteen_and_over(self):
+        return self.state['frames']['sixteen_and_over']
+
+    @property
+    def sixteen_and_sixty_four(self):
+        return self.state['frames']['sixteen_and_sixty_four']
+
+    @property
+    def page_figures(self):
+        return self.state['page_figures']
+
+    @property
+    def page_figures_json(self):
+        return self.state['page_figures_json']
+
+    def build_page_figures(self, frames):
+        """
+        Build the figures of the "16 & over" and "16 to 64" pages.
+
+        The figures are kept as plain dictionaries keyed by the page
+        pathname. `load_state` encodes them to JSON once, and that encoding
+        is what the pages fetch (see `setup_page_figure_route`), so the
+        Plotly figures are neither rebuilt nor re-encoded on navigation.
+
+        Parameters:
+        -----------
+        frames : dict
+            The base frames keyed by dataset.
+
+        Returns:
+        --------
+        dict
+            The levels and rates figures of each page.
+        """
+        pages = {
+            '/sixteen_and_over': (frames['sixteen_and_over'], '16 & Over',
+                                  ['All aged 16 & over level'] + LEVEL_COLUMNS),
+            '/sixteen_and_sixty_four': (frames['sixteen_and_sixty_four'], '16 to 64',
+                                        ['All aged 16 to 64 level'] + LEVEL_COLUMNS),
+        }
+        figures = {}
+        for pathname, (df, age_label, level_columns) in pages.items():
+            fig_levels, fig_rates = self.plot_manager.create_population_plots(
+                df, age_label, level_columns, RATE_COLUMNS, max_points=self.max_points)
+            figures[pathname] = (self.figure_payload(fig_levels), self.figure_payload(fig_rates))
+        return figures
+
+    def data_version(self):
+        """
+        Return a token that changes whenever the base files or the data
+        snapshot change.
+        """
+        paths = [os.path.join(self.file_handler.processed_dir, filename)
+                 for filename in DATASET_FILES.values()]
+        if self.file_handler.snapshot is not None:
+            paths.append(self.file_handler.snapshot.manifest_path)
+        parts = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                parts.append(f"{stat.st_mtime_ns}:{stat.st_size}")
+            except FileNotFoundError:
+                parts.append('-')
+        return '/'.join(parts)
+
+    def reload(self):
+        """
+        Pick up new data and new model results without a restart.
+
+        When the base files or the snapshot changed, a complete new state
+        is loaded next to the current one and then swapped in with a single
+        assignment, so requests keep being served from the previous state
+        until the new one is ready and never see a partly loaded one. Model
+        results need no reloading, as they are read per request from the
+        published version, but the forecast cache is warmed again for a
+        new version when `warm_cache` is set.
+
+        Returns:
+        --------
+        bool
+            Whether anything changed.
+        """
+        changed = False
+        if self.data_version() != self.state['version']:
+            started = time.time()
+            self.state = self.load_state()
+            print(f"Reloaded the dashboard data in {time.time() - started:.2f}s")
+            changed = True
+
+        results_version = self.file_handler.results_version()
+        if results_version != self.results_version_seen:
+            self.results_version_seen = results_version
+            if self.warm_cache:
+                self.warm_forecast_cache()
+            print(f"Model results changed, now reading {self.file_handler.results_dir()}")
+            changed = True
+        return changed
+
+    def setup_reloading(self, interval):
+        """
+        Check for new data and model results every `interval` seconds.
+
+        The checks run in a background thread started by the first request
+        of each process, as threads do not survive the fork of the gunicorn
+        --preload workers.
+        """
+        watcher = {'pid': None}
+        lock = threading.Lock()
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reload()
+                except Exception as e:
+                    # Keep serving the current state, retry on the next check
+                    print(f"Reloading the dashboard data failed: {e}")
+
+        @self.server.before_request
+        def start_watcher():
+            if watcher['pid'] != os.getpid():
+                with lock:
+                    if watcher['pid'] != os.getpid():
+                        watcher['pid'] = os.getpid()
+                        threading.Thread(target=watch, daemon=True).start()
+
+    def figure_options(self):
+        """
+        Return the options the page figures depend on.
+        """
+        return {'payload_decimals': self.payload_decimals, 'max_points': self.max_points}
+
+    def setup_version_pinning(self):
+        """
+        Pin the published model results for the duration of each request,
+        so a callback never mixes two versions of the results.
+        """
+        @self.server.before_request
+        def pin_results_version():
+            self.file_handler.pin()
+
+        @self.server.teardown_request
+        def unpin_results_version(exception=None):
+            self.file_handler.unpin()
+
+    def setup_startup_timing(self, started_at):
+        """
+        Measure the time from startup to the first request served.
+
+        `started_at` is the time the process started loading the app. The
+        setup time and the time to the first request are printed and
+        served as JSON on /_startup-stats.
+        """
+        self.startup_stats['setup_seconds'] = round(time.time() - started_at, 3)
+
+        @self.server.before_request
+        def record_first_request():
+            if 'first_request_seconds' not in self.startup_stats:
+                self.startup_stats['first_request_seconds'] = round(time.time() - started_at, 3)
+                print(f"Time to first request: {self.startup_stats['first_request_seconds']}s "
+                      f"(setup {self.startup_stats['setup_seconds']}s)")
+
+        @self.server.route('/_startup-stats')
+        def startup_stats():
+            return self.startup_stats
+
+    def setup_page_figure_route(self):
+        """
+        Serve the JSON of the population page figures encoded by
+        `load_state` on _page-figures/<page>, under the app's path prefix.
+
+        The bytes are sent as they are, tagged with the data version so
+        the browser revalidates them and only downloads them again after a
+        reload.
+        """
+        @self.server.route(f"{self.app.config.routes_pathname_prefix}_page-figures/<page>")
+        def page_figures(page):
+            state = self.state
+            body = state['page_figures_json'].get(f"/{page}")
+            if body is None:
+                return Response(status=404)
+            response = Response(body, mimetype='application/json')
+            response.set_etag(state['version'])
+            response.cache_control.no_cache = True
+            return response.make_conditional(request)
+
+    def figure_payload(self, fig):
+        """
+        Convert a figure into the JSON-ready dictionary sent to the browser.
+        """
+        figure = self.plot_manager.figure_to_dict(fig)
+        if self.payload_decimals is not None:
+            figure = self.plot_manager.compact_figure(figure, self.payload_decimals)
+        return figure
+
+    def setup_payload_stats(self):
+        """
+        Count the response bytes of every callback output.
+
+        For each output the number of responses, the bytes of the JSON
+        bodies and the bytes they take once gzipped are accumulated and
+        served as JSON on /_payload-stats.
+        """
+        @self.server.after_request
+        def record_payload(response):
+            if request.path.endswith('/_dash-update-component') and not response.direct_passthrough:
+                body = response.get_data()
+                output = (request.get_json(silent=True) or {}).get('output', '?')
+                stats = self.payload_stats.setdefault(
+                    output, {'responses': 0, 'bytes': 0, 'gzip_bytes': 0})
+                stats['responses'] += 1
+                stats['bytes'] += len(body)
+                stats['gzip_bytes'] += len(gzip.compress(body))
+            return response
+
+        @self.server.route('/_payload-stats')
+        def payload_stats():
+            return self.payload_stats
+
+    def forecast_columns(self, base_file):
+        """
+        List the forecasted columns of a dataset.
+        """
+        return self.state['columns'][base_file]
+
+    def build_forecast_figure(self, base_file, column_name, model_name, x_range=None):
+        """
+        Build the forecast figure of a model for a column.
+
+        Parameters:
+        -----------
+        base_file : str
+            The dataset name (e.g. "sixteen_and_over").
+        column_name : str
+            The column name (e.g. "Employment rate").
+        model_name : str
+            The model name (e.g. "linear_regression").
+        x_range : list of str, optional
+            Zoomed date range; the figure then holds only the points of
+            that range, downsampled to `max_points`.
+
+        Returns:
+        --------
+        dict
+            The JSON-ready figure, empty when there is no usable forecast.
+        """
+        print(
+            f"Selected file: {base_file}, column: {column_name}, model: {model_name}")
+        try:
+            df = self.file_handler.load_forecast(
+                base_file, model_name, column_name)
+        except Exception as e:
+            print(f"Error loading forecast for {base_file}, {model_name}, {column_name}: {e}")
+            return self.figure_payload(go.Figure())
+
+        if df is None:
+            print(
+                f"No forecast found for {base_file}, {model_name}, {column_name}")
+            return self.figure_payload(go.Figure())
+        print(f"Loaded forecast with columns: {df.columns}")
+
+        if 'Actual' not in df.columns or (
+                'yhat' not in df.columns and 'Prediction' not in df.columns):
+            print(
+                f"Missing required columns in forecast file: {df.columns}")
+            return self.figure_payload(go.Figure())
+
+        return self.figure_payload(self.plot_manager.create_plot(
+            df, column_name, max_points=self.max_points, x_range=x_range))
+
+    def build_comparison_figure(self, base_file, column_name):
+        """
+        Build the figure overlaying every model's forecast of a column.
+
+        All forecasts come from one read of the forecast store (see
+        FileHandler.load_forecasts).
+
+        Parameters:
+        -----------
+        base_file : str
+            The dataset name (e.g. "sixteen_and_over").
+        column_name : str
+            The column name (e.g. "Employment rate").
+
+        Returns:
+        --------
+        dict
+            The JSON-ready figure.
+        """
+        df = self.file_handler.load_forecasts(base_file, column_name, FORECAST_MODELS)
+        return self.figure_payload(self.plot_manager.create_overlay_plot(
+            df, column_name, max_points=self.max_points))
+
+    def metrics_by_dataset(self):
+        """
+        Load the metrics comparison with a 'Dataset' column.
+
+        The column of metrics written before it existed is inferred by
+        FileHandler.infer_metric_datasets.
+
+        Returns:
+        --------
+        pd.DataFrame or None
+            The metrics, or None when no metrics were written.
+        """
+        metrics = self.file_handler.load_metrics()
+        if metrics is None or 'Dataset' in metrics.columns:
+            return metrics
+
+        return FileHandler.infer_metric_datasets(
+            metrics, {dataset: self.forecast_columns(dataset) for dataset in DATASET_FILES})
+
+    def build_leaderboard(self, base_file, column_name):
+        """
+        Rank the models of a column by their RMSE.
+
+        Parameters:
+        -----------
+        base_file : str
+            The dataset name (e.g. "sixteen_and_over").
+        column_name : str
+            The column name (e.g. "Employment rate").
+
+        Returns:
+        --------
+        list of dict
+            One record per model with its rank, RMSE, MAE and MAPE.
+        """
+        metrics = self.metrics_by_dataset()
+        if metrics is None:
+            return []
+        rows = metrics[(metrics['Dataset'] == base_file) & (metrics['Column'] == column_name)]
+        rows = rows.sort_values('RMSE').reset_index(drop=True)
+        board = pd.DataFrame({
+            'Rank': np.arange(1, len(rows) + 1),
+            'Model': rows['Model'],
+            'RMSE': rows['RMSE'].round(3),
+            'MAE': rows['MAE'].round(3),
+            'MAPE': rows['MAPE'].round(3),
+        })
+        return board.to_dict('records')
+
+    def build_dataset_payload(self, base_file, decimals=4):
+        """
+        Build the compact payload holding every forecast of a dataset.
+
+        Dates are sent as days since the epoch and shared between the
+        forecasts that use the same axis; values are rounded to `decimals`
+        places and missing values become null.
+
+        Parameters:
+        -----------
+        base_file : str
+            The dataset name (e.g. "sixteen_and_over").
+        decimals : int, optional
+            Number of decimal places kept, default is 4.
+
+        Returns:
+        --------
+        dict
+            {'axes': [[day, ...], ...],
+             'series': {column: {model: {'axis', 'actual', 'prediction'}}}}
+        """
+        axes = []
+        axis_ids = {}
+        series = {}
+
+        def to_list(values):
+            values = np.round(pd.to_numeric(values, errors='coerce').to_numpy(dtype=float), decimals)
+            return [None if np.isnan(v) else float(v) for v in values]
+
+        models = [model['value'] for model in MODEL_OPTIONS]
+        for column_name in self.forecast_columns(base_file):
+            # One read per column for all models
+            forecasts = self.file_handler.load_forecasts(base_file, column_name, models)
+            for model_name, df in forecasts.groupby('Model', sort=False):
+                prediction = df['Prediction']
+                days = tuple((pd.to_datetime(df['Start Date']).to_numpy(dtype='datetime64[D]')
+                              .astype(np.int64)).tolist())
+                if days not in axis_ids:
+                    axis_ids[days] = len(axes)
+                    axes.append(list(days))
+                series.setdefault(column_name, {})[model_name] = {
+                    'axis': axis_ids[days],
+                    'actual': to_list(df['Actual']),
+                    'prediction': to_list(prediction),
+                }
+        return {'axes': axes, 'series': series}
+
+    @staticmethod
+    def relayout_range(relayout_data):
+        """
+        Extract the x axis range from the relayoutData of a graph.
+
+        Returns:
+        --------
+        list of str, 'full' or None
+            The zoomed range, 'full' when the axis was reset, or None when
+            the x axis did not change.
+        """
+        if not relayout_data:
+            return None
+        if relayout_data.get('xaxis.autorange'):
+            return 'full'
+        if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+            return [str(relayout_data['xaxis.range[0]']), str(relayout_data['xaxis.range[1]'])]
+        if 'xaxis.range' in relayout_data:
+            return [str(value) for value in relayout_data['xaxis.range']]
+        return None
+
+    def warm_forecast_cache(self):
+        """
+        Build the forecast figure of every dataset, column and model, or
+        the payload of every dataset in client-side mode.
+        """
+        for dataset in DATASET_OPTIONS:
+            if self.client_side:
+                self.dataset_payload(dataset['value'])
+                continue
+            for column_name in self.forecast_columns(dataset['value']):
+                for model in MODEL_OPTIONS:
+                    self.forecast_figure(dataset['value'], column_name, model['value'])
 
     def setup_footer(self):
         """
@@ -180,6 +780,10 @@ class DashboardManager:
                     dbc.NavLink(
                         "16 to 64",
                         href="/sixteen_and_sixty_four")),
+                dbc.NavItem(
+                    dbc.NavLink(
+                        "Compare models",
+                        href="/compare")),
         ])
 
         self.app.layout = html.Div([
@@ -244,218 +848,103 @@ class DashboardManager:
                 return self.sixteen_and_over_page
             elif pathname == '/sixteen_and_sixty_four':
                 return self.sixteen_and_sixty_four_page
+            elif pathname == '/compare':
+                return self.state['compare_page']
             else:
-                return self.home_page
+                return self.state['home_page']
 
         @self.app.callback(
             Output('column-dropdown', 'options'),
             [Input('base-file-dropdown', 'value')]
         )
         def update_columns(base_file):
-            if base_file == 'sixteen_and_over':
-                df = self.sixteen_and_over
-            else:
-                df = self.sixteen_and_sixty_four
-
-            return [{'label': col, 'value': col} for col in df.columns if col not in [
-                'Start Date', 'End Date', 'Dataset identifier code']]
+            return self.state['column_options'][base_file]
 
         @self.app.callback(
-            Output('forecast-plot', 'figure'),
-            [Input('base-file-dropdown', 'value'),
-             Input('column-dropdown', 'value'),
-             Input('model-dropdown', 'value')]
+            Output('compare-column-dropdown', 'options'),
+            [Input('compare-base-file-dropdown', 'value')]
         )
-        def update_plot(base_file, column_name, model_name):
-            if base_file is None or column_name is None or model_name is None:
-                return go.Figure()
-
-            print(
-                f"Selected file: {base_file}, column: {column_name}, model: {model_name}")
-            forecast_file = self.file_handler.list_model_files(
-                base_file, model_name, column_name)
-            print(f"Forecast file: {forecast_file}")
-            if forecast_file is None:
-                print(
-                    f"No forecast file found for {base_file}, {model_name}, {column_name}")
-                return go.Figure()
-
-            print(f"Forecast file found: {forecast_file}")
-            try:
-                df = self.file_handler.load_file(
-                    self.file_handler.model_results_dir, forecast_file)
-                print(f"Loaded forecast file with columns: {df.columns}")
-            except Exception as e:
-                print(f"Error loading forecast file {forecast_file}: {e}")
-                return go.Figure()
+        def update_compare_columns(base_file):
+            return self.state['column_options'][base_file]
 
-            if 'Actual' not in df.columns or (
-                    'yhat' not in df.columns and 'Prediction' not in df.columns):
-                print(
-                    f"Missing required columns in forecast file: {df.columns}")
-                return go.Figure()
-
-            return self.plot_manager.create_plot(df, column_name)
+        @self.app.callback(
+            Output('compare-plot', 'figure'),
+            Output('compare-leaderboard', 'children'),
+            [Input('compare-base-file-dropdown', 'value'),
+             Input('compare-column-dropdown', 'value')]
+        )
+        def update_comparison(base_file, column_name):
+            if base_file is None or column_name is None:
+                raise PreventUpdate
+
+            board = self.leaderboard(base_file, column_name)
+            if board:
+                table = dbc.Table.from_dataframe(
+                    pd.DataFrame(board), striped=True, bordered=True, hover=True, size='sm')
+            else:
+                table = html.P("No metrics available for this series.")
+            return self.comparison_figure(base_file, column_name), table
+
+        if self.client_side:
+            # Only a dataset change reaches the server
+            @self.app.callback(
+                Output('dataset-payload', 'data'),
+                [Input('base-file-dropdown', 'value')]
+            )
+            def update_payload(base_file):
+                if base_file is None:
+                    return None
+                return self.dataset_payload(base_file)
+
+            self.app.clientside_callback(
+                CLIENTSIDE_FORECAST_FIGURE,
+                Output('forecast-plot', 'figure'),
+                [Input('dataset-payload', 'data'),
+                 Input('column-dropdown', 'value'),
+                 Input('model-dropdown', 'value')]
+            )
+        else:
+            @self.app.callback(
+                Output('forecast-plot', 'figure'),
+                [Input('base-file-dropdown', 'value'),
+                 Input('column-dropdown', 'value'),
+                 Input('model-dropdown', 'value'),
+                 Input('forecast-plot', 'relayoutData')]
+            )
+            def update_plot(base_file, column_name, model_name, relayout_data):
+                if base_file is None or column_name is None or model_name is None:
+                    return go.Figure()
+
+                x_range = None
+                if dash.callback_context.triggered_id == 'forecast-plot':
+                    # Zooming only needs a new figure when the points are
+                    # downsampled; otherwise the browser already has them all
+                    if self.max_points is None:
+                        raise PreventUpdate
+                    x_range = self.relayout_range(relayout_data)
+                    if x_range is None:
+                        raise PreventUpdate
+                    if x_range == 'full':
+                        x_range = None
+                return self.forecast_figure(base_file, column_name, model_name, x_range)
 
         # Display graphs for 'Sixteen and Over'
-        @self.app.callback(
+        self.app.clientside_callback(
+            CLIENTSIDE_PAGE_FIGURES % {'page': '/sixteen_and_over',
+                                       'url': self.app.get_relative_path('/_page-figures/sixteen_and_over')},
             Output('sixteen-over-levels-plot', 'figure'),
             Output('sixteen-over-rates-plot', 'figure'),
             [Input('url', 'pathname')]
         )
-        def update_sixteen_over_graphs(base_file):
-            fig_levels = go.Figure()
-            fig_rates = go.Figure()
-
-            # Population levels for 'Sixteen and Over'
-            fig_levels.add_trace(
-                go.Scatter(
-                    x=self.sixteen_and_over['Start Date'],
-                    y=self.sixteen_and_over['All aged 16 & over level'],
-                    mode='lines+markers',
-                    name='All aged 16 & over level'))
-            fig_levels.add_trace(
-                go.Scatter(
-                    x=self.sixteen_and_over['Start Date'],
-                    y=self.sixteen_and_over['Total economically active level'],
-                    mode='lines+markers',
-                    name='Total economically active level'))
-            fig_levels.add_trace(
-                go.Scatter(
-                    x=self.sixteen_and_over['Start Date'],
-                    y=self.sixteen_and_over['Total in employment level'],
-                    mode='lines+markers',
-                    name='Total in employment level'))
-            fig_levels.add_trace(
-                go.Scatter(
-                    x=self.sixteen_and_over['Start Date'],
-                    y=self.sixteen_and_over['Unemployed level'],
-                    mode='lines+markers',
-                    name='Unemployed level'))
-            fig_levels.add_trace(
-                go.Scatter(
-                    x=self.sixteen_and_over['Start Date'],
-                    y=self.sixteen_and_over['Economically inactive level'],
-                    mode='lines+markers',
-                    name='Economically inactive level'))
-
-            fig_levels.update_layout(
-                title="Population Levels Over Time (16 & Over)",
-                xaxis_title="Date",
-                yaxis_title="Population Levels")
-
-            # Population rates for 'Sixteen and Over'
-            fig_rates.add_trace(
-                go.Scatter(
-                    x=self.sixteen_and_over['Start Date'],
-                    y=self.sixteen_and_over['Economic activity rate'],
-                    mode='lines+markers',
-                    name='Economic activity rate'))
-            fig_rates.add_trace(
-                go.Scatter(
-                    x=self.sixteen_and_over['Start Date'],
-                    y=self.sixteen_and_over['Employment rate'],
-                    mode='lines+markers',
-                    name='Employment rate'))
-            fig_rates.add_trace(
-                go.Scatter(
-                    x=self.sixteen_and_over['Start Date'],
-                    y=self.sixteen_and_over['Unemployment rate'],
-                    mode='lines+markers',
-                    name='Unemployment rate'))
-            fig_rates.add_trace(
-                go.Scatter(
-                    x=self.sixteen_and_over['Start Date'],
-                    y=self.sixteen_and_over['Economic inactivity rate'],
-                    mode='lines+markers',
-                    name='Economic inactivity rate'))
-
-            fig_rates.update_layout(
-                title="Population Rates Over Time (16 & Over)",
-                xaxis_title="Date",
-                yaxis_title="Rates (%)")
-
-            return fig_levels, fig_rates
 
         # Display graphs for 'Sixteen and Sixty-Four'
-        @self.app.callback(
+        self.app.clientside_callback(
+            CLIENTSIDE_PAGE_FIGURES % {'page': '/sixteen_and_sixty_four',
+                                       'url': self.app.get_relative_path('/_page-figures/sixteen_and_sixty_four')},
             Output('sixteen-sixty-four-levels-plot', 'figure'),
             Output('sixteen-sixty-four-rates-plot', 'figure'),
             [Input('url', 'pathname')]
         )
-        def update_sixteen_sixty_four_graphs(base_file):
-            fig_levels = go.Figure()
-            fig_rates = go.Figure()
-
-            # Population levels for 'Sixteen and Sixty-Four'
-            fig_levels.add_trace(
-                go.Scatter(
-                    x=self.sixteen_and_sixty_four['Start Date'],
-                    y=self.sixteen_and_sixty_four['All aged 16 to 64 level'],
-                    mode='lines+markers',
-                    name='All aged 16 to 64 level'))
-            fig_levels.add_trace(
-                go.Scatter(
-                    x=self.sixteen_and_sixty_four['Start Date'],
-                    y=self.sixteen_and_sixty_four['Total economically active level'],
-                    mode='lines+markers',
-                    name='Total economically active level'))
-            fig_levels.add_trace(
-                go.Scatter(
-                    x=self.sixteen_and_sixty_four['Start Date'],
-                    y=self.sixteen_and_sixty_four['Total in employment level'],
-                    mode='lines+markers',
-                    name='Total in employment level'))
-            fig_levels.add_trace(
-                go.Scatter(
-                    x=self.sixteen_and_sixty_four['Start Date'],
-                    y=self.sixteen_and_sixty_four['Unemployed level'],
-                    mode='lines+markers',
-                    name='Unemployed level'))
-            fig_levels.add_trace(
-                go.Scatter(
-                    x=self.sixteen_and_sixty_four['Start Date'],
-                    y=self.sixteen_and_sixty_four['Economically inactive level'],
-                    mode='lines+markers',
-                    name='Economically inactive level'))
-
-            fig_levels.update_layout(
-                title="Population Levels Over Time (16 to 64)",
-                xaxis_title="Date",
-                yaxis_title="Population Levels")
-
-            # Population rates for 'Sixteen and Sixty-Four'
-            fig_rates.add_trace(
-                go.Scatter(
-                    x=self.sixteen_and_sixty_four['Start Date'],
-                    y=self.sixteen_and_sixty_four['Economic activity rate'],
-                    mode='lines+markers',
-                    name='Economic activity rate'))
-            fig_rates.add_trace(
-                go.Scatter(
-                    x=self.sixteen_and_sixty_four['Start Date'],
-                    y=self.sixteen_and_sixty_four['Employment rate'],
-                    mode='lines+markers',
-                    name='Employment rate'))
-            fig_rates.add_trace(
-                go.Scatter(
-                    x=self.sixteen_and_sixty_four['Start Date'],
-                    y=self.sixteen_and_sixty_four['Unemployment rate'],
-                    mode='lines+markers',
-                    name='Unemployment rate'))
-            fig_rates.add_trace(
-                go.Scatter(
-                    x=self.sixteen_and_sixty_four['Start Date'],
-                    y=self.sixteen_and_sixty_four['Economic inactivity rate'],
-                    mode='lines+markers',
-                    name='Economic inactivity rate'))
-
-            fig_rates.update_layout(
-                title="Population Rates Over Time (16 to 64)",
-                xaxis_title="Date",
-                yaxis_title="Rates (%)")
-
-            return fig_levels, fig_rates
 
     def run(self, port=8050):
         """
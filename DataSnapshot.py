@@ -0,0 +1,265 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+import numpy as np
+import pandas as pd
+
+
+class DataSnapshot:
+    """
+    Binary snapshot of the data the dashboard needs at startup.
+
+    The processed data and the metrics are stored column by column as NumPy
+    files that are memory-mapped when read, so starting the dashboard does
+    not parse any CSV. The figures of the population pages are stored
+    ready to be sent. The forecasts themselves already live in the
+    memory-mappable forecast store (see ForecastStore) and are not copied.
+
+    Numeric columns stay backed by the mapped files instead of being copied
+    into the process, so the frames are read-only and every process mapping
+    the snapshot, e.g. all gunicorn workers, shares a single copy of the
+    data through the page cache.
+
+    Every frame records the modification time and size of the CSV file it
+    was built from; a frame whose source has changed since is ignored, so a
+    stale snapshot never hides new data.
+
+    The column files of a snapshot live in their own folder named by the
+    manifest, which is replaced last, so building a new snapshot publishes
+    it atomically.
+
+    Attributes:
+    -----------
+    directory : str
+        Directory holding the snapshot.
+
+    Methods:
+    --------
+    exists():
+        Check whether a snapshot has been written.
+    write(frames, figures, figure_options):
+        Write a new snapshot.
+    read_frame(path):
+        Read a frame by the path of its source file.
+    page_figures(figure_options):
+        Read the stored page figures.
+    """
+
+    MANIFEST_FILE = 'manifest.json'
+
+    def __init__(self, directory='snapshot'):
+        self.directory = directory
+        self._loaded_token = None
+        self._manifest = None
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, self.MANIFEST_FILE)
+
+    def exists(self):
+        """
+        Check whether a snapshot has been written to the directory.
+        """
+        return os.path.exists(self.manifest_path)
+
+    @staticmethod
+    def _key(path):
+        return os.path.normpath(path)
+
+    @staticmethod
+    def _signature(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def _load(self):
+        """
+        Read the manifest, again only when it changed.
+        """
+        stat = os.stat(self.manifest_path)
+        token = (stat.st_mtime_ns, stat.st_size)
+        if token == self._loaded_token:
+            return
+        # The dashboard reloads from a background thread while serving
+        with self._lock:
+            if token == self._loaded_token:
+                return
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            self._manifest, self._frames = manifest, {}
+            self._loaded_token = token
+
+    def _is_fresh(self, key):
+        # A deployment may ship the snapshot without its CSV sources
+        signature = self._signature(key)
+        return signature is None or signature == self._manifest['frames'][key]['source']  # type: ignore
+
+    def read_frame(self, path):
+        """
+        Read a frame by the path of the CSV file it was built from.
+
+        Parameters:
+        -----------
+        path : str
+            Path of the source CSV file.
+
+        Returns:
+        --------
+        pd.DataFrame or None
+            The frame, or None when the snapshot does not hold the file or
+            the file has changed since the snapshot was built.
+        """
+        if not self.exists():
+            return None
+        self._load()
+        key = self._key(path)
+        entry = self._manifest['frames'].get(key)  # type: ignore
+        if entry is None or not self._is_fresh(key):
+            return None
+        if key not in self._frames:
+            data_dir = os.path.join(self.directory, self._manifest['data_dir'])  # type: ignore
+            columns = {}
+            for column in entry['columns']:
+                values = np.load(os.path.join(data_dir, column['file']), mmap_mode='r')
+                if column['kind'] == 'str':
+                    values = values.astype(object)
+                    if column['mask'] is not None:
+                        values[np.load(os.path.join(data_dir, column['mask']))] = np.nan
+                columns[column['name']] = values
+            # copy=False keeps the numeric columns as views of the mapped files
+            self._frames[key] = pd.DataFrame(columns, copy=False)
+        return self._frames[key]
+
+    def page_figures(self, figure_options):
+        """
+        Read the stored page figures.
+
+        Parameters:
+        -----------
+        figure_options : dict
+            The options the figures must have been built with.
+
+        Returns:
+        --------
+        dict or None
+            The figures keyed by page pathname, or None when the snapshot
+            holds no figures for these options or their data has changed.
+        """
+        if not self.exists():
+            return None
+        self._load()
+        figures = self._manifest.get('figures')  # type: ignore
+        if figures is None or figures['options'] != figure_options:
+            return None
+        if not all(self._is_fresh(key) for key in figures['sources']):
+            return None
+        return {pathname: tuple(page) for pathname, page in figures['pages'].items()}
+
+    def write(self, frames, figures=None, figure_options=None, figure_sources=()):
+        """
+        Write a new snapshot, replacing the current one.
+
+        Parameters:
+        -----------
+        frames : dict
+            DataFrames keyed by the path of the CSV file they were read from.
+        figures : dict, optional
+            JSON-ready page figures keyed by page pathname.
+        figure_options : dict, optional
+            The options the figures were built with.
+        figure_sources : list of str, optional
+            The CSV files the figures were built from.
+        """
+        data_dir = f"snapshot-{uuid.uuid4().hex}"
+        os.makedirs(os.path.join(self.directory, data_dir))
+
+        manifest = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'data_dir': data_dir, 'frames': {}}
+        for n, (path, df) in enumerate(frames.items()):
+            columns = []
+            for m, name in enumerate(df.columns):
+                file_name = f"frame{n}_column{m}.npy"
+                values = df[name]
+                mask_name = None
+                if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+                    kind = 'array'
+                    array = values.to_numpy()
+                else:
+                    kind = 'str'
+                    missing = values.isna().to_numpy()
+                    if missing.any():
+                        mask_name = f"frame{n}_column{m}_mask.npy"
+                        np.save(os.path.join(self.directory, data_dir, mask_name), missing)
+                    array = values.fillna('').astype(str).to_numpy(dtype=str)
+                np.save(os.path.join(self.directory, data_dir, file_name), array)
+                columns.append({'name': name, 'file': file_name, 'kind': kind, 'mask': mask_name})
+            key = self._key(path)
+            manifest['frames'][key] = {'source': self._signature(key), 'n_rows': len(df),
+                                       'columns': columns}
+
+        if figures is not None:
+            manifest['figures'] = {
+                'options': figure_options or {},
+                'sources': [self._key(path) for path in figure_sources],
+                'pages': {pathname: list(page) for pathname, page in figures.items()},
+            }
+
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+        self._remove_stale_data_dirs(data_dir)
+
+    def _remove_stale_data_dirs(self, current):
+        for name in os.listdir(self.directory):
+            if name.startswith('snapshot-') and name != current:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def build(self, dashboard_manager):
+        """
+        Snapshot the data and page figures of a dashboard.
+
+        Parameters:
+        -----------
+        dashboard_manager : DashboardManager
+            A dashboard built from the CSV files.
+        """
+        file_handler = dashboard_manager.file_handler
+        processed = [os.path.join(file_handler.processed_dir, name)
+                     for name in ('sixteen_and_over.csv', 'sixteen_and_sixty_four.csv')]
+        frames = {path: file_handler.load_file(*os.path.split(path)) for path in processed}
+        metrics_path = os.path.join(file_handler.results_dir(), 'metrics_comparison.csv')
+        if os.path.exists(metrics_path):
+            frames[metrics_path] = file_handler.load_file(*os.path.split(metrics_path))
+
+        self.write(frames, figures=dashboard_manager.page_figures,
+                   figure_options=dashboard_manager.figure_options(),
+                   figure_sources=processed)
+
+
+# Example usage: build the snapshot with the options of app.py
+if __name__ == "__main__":
+    from DashboardManager import DashboardManager
+    from FileHandler import FileHandler
+    from PlotManager import PlotManager
+
+    file_handler = FileHandler(processed_dir='processed', model_results_dir='model_results')
+    if not file_handler.forecast_store.exists():
+        file_handler.forecast_store.import_csv_files(
+            datasets=['sixteen_and_over', 'sixteen_and_sixty_four'],
+            models=['linear_regression', 'prophet', 'arima', 'sarima',
+                    'holt_winters', 'xgboost', 'lstm'])
+    dashboard_manager = DashboardManager(
+        file_handler, PlotManager(),
+        payload_decimals=int(os.environ['PAYLOAD_DECIMALS']) if 'PAYLOAD_DECIMALS' in os.environ else None,
+        max_points=int(os.environ['PLOT_MAX_POINTS']) if 'PLOT_MAX_POINTS' in os.environ else None)
+
+    snapshot = DataSnapshot(os.environ.get('DATA_SNAPSHOT', 'snapshot'))
+    snapshot.build(dashboard_manager)
+    print(f"Snapshot written to {snapshot.directory}")
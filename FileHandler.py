@@ -1,13 +1,81 @@
 import os
+import threading
+from collections import OrderedDict
 import pandas as pd
+from ForecastStore import ForecastStore
+from DataSnapshot import DataSnapshot
+from ResultsPublisher import ResultsPublisher
 
 class FileHandler:
     """
     Class to handle file operations, such as loading data from CSV files.
+
+    Loaded files are kept in a bounded in-memory cache keyed by path. An
+    entry is reused only while the file keeps the modification time and
+    size it had when it was read, and the least recently used entries are
+    evicted once the cached frames exceed `cache_max_bytes`.
+
+    When `snapshot_dir` holds a data snapshot (see DataSnapshot), files it
+    contains are memory-mapped from it instead of being parsed.
+
+    Model results are read from the version published by ResultsPublisher.
+    A thread can `pin` the version, e.g. for the duration of a request, so
+    that all its reads see the same results even if a new version is
+    published meanwhile.
     """
-    def __init__(self, processed_dir, model_results_dir):
+    def __init__(self, processed_dir, model_results_dir, cache_max_bytes=64 * 1024 ** 2,
+                 snapshot_dir=None):
         self.processed_dir = processed_dir
         self.model_results_dir = model_results_dir
+        self.publisher = ResultsPublisher(model_results_dir)
+        self._stores = {}  # results directory -> ForecastStore
+        self._pinned = threading.local()
+        self.snapshot = DataSnapshot(snapshot_dir) if snapshot_dir else None
+        self.cache_max_bytes = cache_max_bytes
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache = OrderedDict()  # path -> (signature, frame, nbytes)
+        self._cache_bytes = 0
+        self._cache_lock = threading.Lock()
+
+    def pin(self):
+        """
+        Pin the current results version for the calling thread.
+
+        Returns:
+        --------
+        str or None
+            The pinned version, None before the first publication.
+        """
+        self._pinned.version = self.publisher.current()
+        self._pinned.active = True
+        return self._pinned.version
+
+    def unpin(self):
+        """
+        Release the version pinned by the calling thread.
+        """
+        self._pinned.active = False
+
+    def results_dir(self):
+        """
+        Return the directory of the results read by the calling thread: the
+        pinned version, or else the published one.
+        """
+        if getattr(self._pinned, 'active', False):
+            return self.publisher.current_dir(self._pinned.version)
+        return self.publisher.current_dir()
+
+    @property
+    def forecast_store(self):
+        """
+        The forecast store of the results read by the calling thread.
+        """
+        directory = self.results_dir()
+        store = self._stores.get(directory)
+        if store is None:
+            store = self._stores[directory] = ForecastStore(directory)
+        return store
 
     def list_files(self):
         """
@@ -34,10 +102,58 @@ class FileHandler:
         Returns:
         --------
         pd.DataFrame
-            The loaded data as a pandas DataFrame.
+            The loaded data as a pandas DataFrame. The frame may be shared
+            with other callers through the cache and must not be modified.
         """
         file_path = os.path.join(directory, filename)
-        return pd.read_csv(file_path)
+        if self.snapshot is not None:
+            df = self.snapshot.read_frame(file_path)
+            if df is not None:
+                return df
+
+        stat = os.stat(file_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._cache_lock:
+            entry = self._cache.get(file_path)
+            if entry is not None and entry[0] == signature:
+                self._cache.move_to_end(file_path)
+                self.cache_hits += 1
+                return entry[1]
+            self.cache_misses += 1
+
+        df = pd.read_csv(file_path)
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+
+        with self._cache_lock:
+            stale = self._cache.pop(file_path, None)
+            if stale is not None:
+                self._cache_bytes -= stale[2]
+            if nbytes <= self.cache_max_bytes:
+                self._cache[file_path] = (signature, df, nbytes)
+                self._cache_bytes += nbytes
+                while self._cache_bytes > self.cache_max_bytes:
+                    _, (_, _, evicted_bytes) = self._cache.popitem(last=False)
+                    self._cache_bytes -= evicted_bytes
+        return df
+
+    def cache_info(self):
+        """
+        Report the state of the loaded-file cache.
+
+        Returns:
+        --------
+        dict
+            Hit and miss counters, number of entries and cached bytes.
+        """
+        with self._cache_lock:
+            return {
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'entries': len(self._cache),
+                'bytes': self._cache_bytes,
+                'max_bytes': self.cache_max_bytes,
+            }
 
     def list_model_files(self, base_name, model_name, column_name):
         """
@@ -61,8 +177,151 @@ class FileHandler:
         # column_name_formatted = column_name.replace(' ', '_')
         pattern = f"{base_name}_{model_name}_{column_name}_forecast.csv"
         print(f"Searching for file with pattern: {pattern}")
-        # Search for the file in the model_results_dir
-        for f in os.listdir(self.model_results_dir):
-            if f == pattern:
-                return f  # Return the filename if found
+        # Check for the file in the model results
+        if os.path.exists(os.path.join(self.results_dir(), pattern)):
+            return pattern  # Return the filename if found
         return None  # Return None if no file is found
+
+    def load_forecast(self, base_name, model_name, column_name):
+        """
+        Load the forecast of a model for a column.
+
+        The forecast is read from the consolidated forecast store when one
+        has been written, otherwise from the per-series CSV file.
+
+        Parameters:
+        -----------
+        base_name : str
+            The base file name (e.g. "sixteen_and_over").
+        model_name : str
+            The model name (e.g. "linear_regression").
+        column_name : str
+            The column name (e.g. "Employment rate").
+
+        Returns:
+        --------
+        pd.DataFrame or None
+            The forecast, or None if there is no forecast for the key.
+        """
+        if self.forecast_store.exists():
+            return self.forecast_store.read(base_name, model_name, column_name)
+
+        forecast_file = self.list_model_files(base_name, model_name, column_name)
+        if forecast_file is None:
+            return None
+        return self.load_file(self.results_dir(), forecast_file)
+
+    def load_forecasts(self, base_name, column_name, models):
+        """
+        Load the forecasts of several models for a column.
+
+        With a forecast store this is a single slice of the store, as the
+        forecasts of all models of a series are stored next to each other.
+        Otherwise the per-model CSV files are loaded one by one.
+
+        Parameters:
+        -----------
+        base_name : str
+            The base file name (e.g. "sixteen_and_over").
+        column_name : str
+            The column name (e.g. "Employment rate").
+        models : list of str or None
+            The models to load; every model of the store when None.
+
+        Returns:
+        --------
+        pd.DataFrame
+            The forecasts in long format, with a 'Model' column in front of
+            the forecast columns. Models without a forecast are left out.
+        """
+        if self.forecast_store.exists():
+            return self.forecast_store.read_series(base_name, column_name, models)
+
+        frames = []
+        for model_name in models or []:
+            forecast_file = self.list_model_files(base_name, model_name, column_name)
+            if forecast_file is None:
+                continue
+            df = self.load_file(self.results_dir(), forecast_file)
+            prediction = df['yhat'] if 'yhat' in df.columns else df['Prediction']
+            frames.append(pd.DataFrame({
+                'Model': model_name,
+                'Start Date': pd.to_datetime(df['Start Date']),
+                'Prediction': prediction,
+                'Actual': df['Actual'],
+            }))
+        if not frames:
+            return pd.DataFrame(columns=['Model', 'Start Date', 'Prediction', 'Actual'])
+        return pd.concat(frames, ignore_index=True)
+
+    def load_metrics(self):
+        """
+        Load the metrics comparison written by the forecasting run.
+
+        Returns:
+        --------
+        pd.DataFrame or None
+            One row of RMSE, MAE and MAPE per dataset, model and column, or
+            None when the file does not exist.
+        """
+        try:
+            return self.load_file(self.results_dir(), 'metrics_comparison.csv')
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def infer_metric_datasets(metrics, dataset_columns):
+        """
+        Add the 'Dataset' column to metrics written before it existed.
+
+        Those files list the datasets one after the other, so the n-th row
+        of a (model, column) pair belongs to the n-th dataset holding that
+        column. Shared by the forecasting run, which merges new metrics
+        into such a file, and the dashboard, which reads it.
+
+        Parameters:
+        -----------
+        metrics : pd.DataFrame
+            Metrics with 'Model' and 'Column' columns.
+        dataset_columns : dict
+            The forecasted columns of every dataset, in the order of the
+            forecasting run.
+
+        Returns:
+        --------
+        pd.DataFrame
+            The metrics with a 'Dataset' column, None where it cannot be
+            inferred.
+        """
+        holders = {}
+        for dataset, columns in dataset_columns.items():
+            for column in columns:
+                holders.setdefault(column, []).append(dataset)
+        occurrence = metrics.groupby(['Model', 'Column']).cumcount()
+        datasets = [
+            holders[column][n] if n < len(holders.get(column, [])) else None
+            for column, n in zip(metrics['Column'], occurrence)]
+        return metrics.assign(Dataset=datasets)
+
+    def results_version(self):
+        """
+        Return a token that changes whenever new model results are written.
+
+        The token is built from the forecast store index and the metrics
+        file of the results being read, which are both rewritten at the end
+        of every forecasting run.
+
+        Returns:
+        --------
+        str
+            The version token.
+        """
+        directory = self.results_dir()
+        parts = [directory]
+        for name in (ForecastStore.INDEX_FILE, 'metrics_comparison.csv'):
+            try:
+                stat = os.stat(os.path.join(directory, name))
+                parts.append(f"{stat.st_mtime_ns}:{stat.st_size}")
+            except FileNotFoundError:
+                parts.append('-')
+        return '/'.join(parts)
\ No newline at end of file
@@ -0,0 +1,157 @@
+import hashlib
+import os
+import pickle
+import numpy as np
+import pandas as pd
+
+
+class ForecastCache:
+    """
+    On-disk cache of fitted models and the forecasts they produced.
+
+    Entries are content addressed: the key is a hash of the series (dates
+    and values), the model class and the version of its code, its
+    hyperparameters and the horizon, so a hit is only possible when
+    refitting would run the same code on exactly the same inputs. Once the cache grows beyond `max_bytes` the least recently
+    used entries are evicted.
+
+    Attributes:
+    -----------
+    cache_dir : str
+        Directory holding one pickle per entry.
+    max_bytes : int
+        Size budget of the cache directory.
+
+    Methods:
+    --------
+    make_key(model, dates, values, periods):
+        Build the cache key of a fit.
+    get(key):
+        Return the cached (fitted model, forecast) pair or None.
+    put(key, fitted_model, forecast_df):
+        Store a fitted model and its forecast.
+    """
+
+    def __init__(self, cache_dir='fit_cache', max_bytes=512 * 1024 ** 2):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    @staticmethod
+    def make_key(model, dates, values, periods):
+        """
+        Build the cache key of a fit.
+
+        Parameters:
+        -----------
+        model : BaseForecastModel
+            The model about to be fitted.
+        dates : array-like
+            The dates of the series.
+        values : array-like
+            The values of the series.
+        periods : int
+            The number of periods to forecast.
+
+        Returns:
+        --------
+        str
+            Hex digest identifying the fit.
+        """
+        digest = hashlib.sha256()
+        model_class = type(model)
+        digest.update(f"{model_class.__module__}.{model_class.__qualname__}".encode())
+        digest.update(model_class.code_version().encode())
+        digest.update(repr(sorted(model.get_params().items())).encode())
+        digest.update(str(periods).encode())
+        dates = pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[ns]')
+        digest.update(dates.view(np.int64).tobytes())
+        digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key):
+        """
+        Return the cached (fitted model, forecast) pair or None on a miss.
+
+        Parameters:
+        -----------
+        key : str
+            A key built by `make_key`.
+
+        Returns:
+        --------
+        tuple or None
+            The fitted model and its forecast DataFrame.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (EOFError, pickle.UnpicklingError):
+            # A truncated entry is treated as a miss and dropped
+            self._remove(path)
+            return None
+
+        # The modification time doubles as the last-used time for eviction
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return entry
+
+    def put(self, key, fitted_model, forecast_df):
+        """
+        Store a fitted model and its forecast.
+
+        Parameters:
+        -----------
+        key : str
+            A key built by `make_key`.
+        fitted_model : BaseForecastModel
+            The fitted model.
+        forecast_df : pd.DataFrame
+            The forecast produced by the model.
+        """
+        path = self._path(key)
+        # Write to a private file and rename it so that concurrent workers
+        # never read a partially written entry
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((fitted_model, forecast_df), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        """
+        Remove the least recently used entries until the budget is met.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pkl'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
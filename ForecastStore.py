@@ -0,0 +1,287 @@
+import json
+import os
+import uuid
+import numpy as np
+import pandas as pd
+
+
+class ForecastStore:
+    """
+    Single columnar store holding the forecasts of every dataset, model and
+    series.
+
+    The rows live in one memory-mappable NumPy file with typed columns
+    (dataset, model, series, date, prediction, lower, upper, actual).
+    They are sorted by (dataset, series, model, date), so the forecast of
+    one model and the forecasts of all models for a series are each a
+    single contiguous slice. A JSON index maps every key to its slice,
+    which makes lookups O(1) without scanning or parsing anything.
+
+    The index names the data file it belongs to and is replaced last, so
+    swapping it in publishes a new store atomically.
+
+    Attributes:
+    -----------
+    directory : str
+        Directory holding the store, usually the model results folder.
+
+    Methods:
+    --------
+    exists():
+        Check whether a store has been written.
+    write(forecasts):
+        Merge forecasts into the store.
+    read(dataset, model, series):
+        Read the forecast of one model for a series.
+    read_series(dataset, series, models):
+        Read the forecasts of several models for a series in one slice.
+    import_csv_files(datasets, models):
+        Build the store from per-series forecast CSV files.
+    """
+
+    INDEX_FILE = 'forecasts_index.json'
+    DTYPE = np.dtype([
+        ('dataset', np.uint16),
+        ('model', np.uint16),
+        ('series', np.uint16),
+        ('date', 'datetime64[D]'),
+        ('prediction', np.float64),
+        ('lower', np.float64),
+        ('upper', np.float64),
+        ('actual', np.float64),
+    ])
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._loaded_token = None
+        self._rows = None
+        self._index = None
+        self._slices = {}
+        self._series_slices = {}
+
+    @property
+    def index_path(self):
+        return os.path.join(self.directory, self.INDEX_FILE)
+
+    def exists(self):
+        """
+        Check whether a store has been written to the directory.
+        """
+        return os.path.exists(self.index_path)
+
+    def _load(self):
+        """
+        Map the current data file, reloading only when the index changed.
+        """
+        stat = os.stat(self.index_path)
+        token = (stat.st_mtime_ns, stat.st_size)
+        if token == self._loaded_token:
+            return
+
+        with open(self.index_path) as f:
+            index = json.load(f)
+        rows = np.load(os.path.join(self.directory, index['data_file']), mmap_mode='r')
+
+        self._slices = {
+            (dataset, model, series): (start, stop)
+            for dataset, model, series, start, stop in index['slices']}
+        self._series_slices = {}
+        for (dataset, _, series), (start, stop) in self._slices.items():
+            first, last = self._series_slices.get((dataset, series), (start, stop))
+            self._series_slices[(dataset, series)] = (min(first, start), max(last, stop))
+        self._index = index
+        self._rows = rows
+        self._loaded_token = token
+
+    def _to_frame(self, rows):
+        # The value columns are views of the mapped rows, only the dates are
+        # converted
+        return pd.DataFrame({
+            'Start Date': pd.to_datetime(rows['date']),
+            'Prediction': rows['prediction'],
+            'Lower': rows['lower'],
+            'Upper': rows['upper'],
+            'Actual': rows['actual'],
+        }, copy=False)
+
+    def keys(self):
+        """
+        Return the (dataset, model, series) keys held by the store.
+        """
+        if not self.exists():
+            return []
+        self._load()
+        return list(self._slices)
+
+    def read(self, dataset, model, series):
+        """
+        Read the forecast of one model for a series.
+
+        Parameters:
+        -----------
+        dataset : str
+            The dataset name (e.g. "sixteen_and_over").
+        model : str
+            The model name (e.g. "linear_regression").
+        series : str
+            The column name (e.g. "Employment rate").
+
+        Returns:
+        --------
+        pd.DataFrame or None
+            Columns 'Start Date', 'Prediction', 'Lower', 'Upper' and
+            'Actual', or None if the store has no such forecast.
+        """
+        self._load()
+        bounds = self._slices.get((dataset, model, series))
+        if bounds is None:
+            return None
+        return self._to_frame(self._rows[bounds[0]:bounds[1]])  # type: ignore
+
+    def read_series(self, dataset, series, models=None):
+        """
+        Read the forecasts of several models for a series in one slice.
+
+        Parameters:
+        -----------
+        dataset : str
+            The dataset name.
+        series : str
+            The column name.
+        models : list of str, optional
+            Models to keep; all models by default.
+
+        Returns:
+        --------
+        pd.DataFrame
+            The forecasts in long format with an extra 'Model' column.
+        """
+        self._load()
+        bounds = self._series_slices.get((dataset, series))
+        if bounds is None:
+            return pd.DataFrame(columns=['Model', 'Start Date', 'Prediction', 'Lower', 'Upper', 'Actual'])
+        rows = self._rows[bounds[0]:bounds[1]]  # type: ignore
+        model_names = np.asarray(self._index['models'], dtype=object)  # type: ignore
+        frame = self._to_frame(rows)
+        frame.insert(0, 'Model', model_names[rows['model']])
+        if models is not None:
+            frame = frame[frame['Model'].isin(models)].reset_index(drop=True)
+        return frame
+
+    @classmethod
+    def _normalise(cls, forecast_df):
+        """
+        Map the columns of a forecast frame onto the store columns.
+        """
+        prediction = forecast_df['yhat'] if 'yhat' in forecast_df else forecast_df['Prediction']
+        lower = forecast_df.get('yhat_lower', forecast_df.get('Lower'))
+        upper = forecast_df.get('yhat_upper', forecast_df.get('Upper'))
+        missing = np.full(len(forecast_df), np.nan)
+        return {
+            'date': pd.to_datetime(forecast_df['Start Date']).to_numpy(dtype='datetime64[D]'),
+            'prediction': pd.to_numeric(prediction, errors='coerce').to_numpy(dtype=np.float64),
+            'lower': missing if lower is None else pd.to_numeric(lower, errors='coerce').to_numpy(dtype=np.float64),
+            'upper': missing if upper is None else pd.to_numeric(upper, errors='coerce').to_numpy(dtype=np.float64),
+            'actual': pd.to_numeric(forecast_df['Actual'], errors='coerce').to_numpy(dtype=np.float64),
+        }
+
+    def write(self, forecasts):
+        """
+        Merge forecasts into the store.
+
+        Forecasts already in the store under other keys are kept, so a run
+        over a subset of the series does not drop the rest.
+
+        Parameters:
+        -----------
+        forecasts : dict
+            Forecast frames keyed by (dataset, model, series).
+        """
+        columns = {}
+        if self.exists():
+            self._load()
+            for key, (start, stop) in self._slices.items():
+                if key not in forecasts:
+                    rows = self._rows[start:stop]  # type: ignore
+                    columns[key] = {name: np.array(rows[name]) for name in
+                                    ('date', 'prediction', 'lower', 'upper', 'actual')}
+        for key, forecast_df in forecasts.items():
+            columns[key] = self._normalise(forecast_df)
+
+        datasets = sorted({key[0] for key in columns})
+        models = sorted({key[1] for key in columns})
+        series = sorted({key[2] for key in columns})
+        n_rows = sum(len(cols['date']) for cols in columns.values())
+        rows = np.empty(n_rows, dtype=self.DTYPE)
+
+        slices = []
+        start = 0
+        for key in sorted(columns, key=lambda k: (k[0], k[2], k[1])):
+            dataset, model, series_name = key
+            cols = columns[key]
+            stop = start + len(cols['date'])
+            block = rows[start:stop]
+            block['dataset'] = datasets.index(dataset)
+            block['model'] = models.index(model)
+            block['series'] = series.index(series_name)
+            for name, values in cols.items():
+                block[name] = values
+            slices.append([dataset, model, series_name, start, stop])
+            start = stop
+
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        data_file = f"forecasts-{uuid.uuid4().hex}.npy"
+        np.save(os.path.join(self.directory, data_file), rows)
+
+        index = {'data_file': data_file, 'n_rows': n_rows, 'datasets': datasets,
+                 'models': models, 'series': series, 'slices': slices}
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+        self._remove_stale_data_files(data_file)
+
+    def _remove_stale_data_files(self, current):
+        for name in os.listdir(self.directory):
+            if name.startswith('forecasts-') and name.endswith('.npy') and name != current:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    # Still mapped by a reader on platforms that forbid it
+                    pass
+
+    def import_csv_files(self, datasets, models):
+        """
+        Build the store from the per-series "<dataset>_<model>_<column>_forecast.csv"
+        files of the directory.
+
+        Parameters:
+        -----------
+        datasets : list of str
+            Dataset names used in the file names.
+        models : list of str
+            Model names used in the file names.
+        """
+        forecasts = {}
+        suffix = '_forecast.csv'
+        for name in os.listdir(self.directory):
+            if not name.endswith(suffix):
+                continue
+            for dataset in datasets:
+                for model in models:
+                    prefix = f"{dataset}_{model}_"
+                    if name.startswith(prefix):
+                        series = name[len(prefix):-len(suffix)]
+                        forecasts[(dataset, model, series)] = pd.read_csv(
+                            os.path.join(self.directory, name))
+        self.write(forecasts)
+
+
+# Example usage: build the store from the CSV files in model_results
+if __name__ == "__main__":
+    store = ForecastStore('model_results')
+    store.import_csv_files(
+        datasets=['sixteen_and_over', 'sixteen_and_sixty_four'],
+        models=['linear_regression', 'prophet', 'arima', 'sarima',
+                'holt_winters', 'xgboost', 'lstm'])
@@ -1,16 +1,91 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime
-from sklearn.metrics import mean_squared_error, mean_absolute_error
 import random
+import ast
+import argparse
+import contextlib
+import hashlib
+import importlib
+import json
 import os
-from models.ARIMAModel import ARIMAModel
-from models.LinearRegressionModel import LinearRegressionModel
-from models.ProphetModel import ProphetModel
-from models.XGBoostModel import XGBoostModel
-from models.HoltWintersModel import HoltWintersModel
-from models.SARIMAModel import SARIMAModel
-from models.LSTMModel import LSTMModel
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from ForecastCache import ForecastCache
+from ModelStateStore import ModelStateStore
+from ForecastStore import ForecastStore
+from FileHandler import FileHandler
+from TaskLedger import TaskLedger
+from ResultsPublisher import ResultsPublisher
+
+# Model name -> (module, class, default arguments). The backends (prophet,
+# darts/torch, xgboost, statsmodels, sklearn) are only imported when one of
+# their models is created.
+MODEL_REGISTRY = {
+    'linear_regression': ('models.LinearRegressionModel', 'LinearRegressionModel', {}),
+    'prophet': ('models.ProphetModel', 'ProphetModel', {}),
+    'arima': ('models.ARIMAModel', 'ARIMAModel', {'order': (2, 0, 2)}),
+    'sarima': ('models.SARIMAModel', 'SARIMAModel',
+               {'order': (3, 0, 0), 'seasonal_order': (0, 1, 0, 12)}),
+    'holt_winters': ('models.HoltWintersModel', 'HoltWintersModel', {'trend': 'add'}),
+    'xgboost': ('models.XGBoostModel', 'XGBoostModel', {}),
+    # One network trained on every series of the run within a CPU budget,
+    # continuing from the previous release's weights (see LSTMModel)
+    'lstm': ('models.LSTMModel', 'LSTMModel',
+             {'input_chunk_length': 12, 'output_chunk_length': 6, 'n_epochs': 100,
+              'global_model': True, 'batch_size': 32, 'validation_periods': 12,
+              'patience': 5, 'max_time': 600, 'warm_start': True, 'warm_start_epochs': 10}),
+}
+# Models whose orders are tuned per series by BestParameters.py
+TUNED_MODELS = ('arima', 'sarima')
+# Ordinal of 1970-01-01, the epoch of datetime64 days
+EPOCH_ORDINAL = 719163
+# Dataset name -> processed file forecasted by default
+DATASETS = {
+    'sixteen_and_over': 'processed/sixteen_and_over.csv',
+    'sixteen_and_sixty_four': 'processed/sixteen_and_sixty_four.csv',
+}
+
+
+def to_ordinals(dates):
+    """
+    Convert dates to their proleptic Gregorian ordinals, as
+    `datetime.toordinal` does, without a Python call per date.
+
+    Parameters:
+    -----------
+    dates : array-like
+        The dates to convert.
+
+    Returns:
+    --------
+    np.ndarray
+        The ordinals as int64.
+    """
+    days = pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[D]')
+    return days.astype(np.int64) + EPOCH_ORDINAL
+
+
+def create_model(name, **arguments):
+    """
+    Create a registered model, importing its backend on first use.
+
+    Parameters:
+    -----------
+    name : str
+        A key of MODEL_REGISTRY.
+    **arguments
+        Arguments overriding the registered defaults.
+
+    Returns:
+    --------
+    BaseForecastModel
+        The new model.
+    """
+    if name not in MODEL_REGISTRY:
+        raise ValueError(f"Unknown model '{name}', expected one of {sorted(MODEL_REGISTRY)}")
+    module_name, class_name, defaults = MODEL_REGISTRY[name]
+    model_class = getattr(importlib.import_module(module_name), class_name)
+    return model_class(**{**defaults, **arguments})
 
 
 class ForecastingManager:
@@ -23,26 +98,44 @@ class ForecastingManager:
         A dictionary of forecasting models.
     output_folder : str
         Path to the output folder where results will be saved.
+    cache : ForecastCache or None
+        Optional cache of fitted models; a hit skips the fit entirely.
+    state_store : ModelStateStore or None
+        Optional store of fitted models used to absorb new releases
+        incrementally instead of refitting from scratch.
+    series_params : dict
+        Per-series model arguments keyed by (dataset, model, column), read
+        by `load_best_parameters`.
 
     Methods:
     --------
     add_model(name, model):
         Add a forecasting model to the manager.
+    load_best_parameters(file_path):
+        Use the tuned orders of the best-parameters table per series.
+    model_for(model_name, base_name, column):
+        Return the model to use for a specific series.
     load_data(file_path):
         Load data from a CSV file.
     forecast_column(model, data, column_name, periods):
         Forecast a specific column using the provided model.
     calculate_metrics(y_true, y_pred):
         Calculate forecast error metrics.
-    save_forecast(df, output_file):
-        Save the forecast data to a CSV file.
-    run_forecast(file_paths, periods):
+    save_forecast(df, output_file, key):
+        Save the forecast data to a CSV file and stage it for the store.
+    flush_forecasts():
+        Write the staged forecasts to the consolidated forecast store.
+    run_forecast(file_paths, periods, n_jobs, model_concurrency, columns):
         Run the forecasting process for all models and save results.
     """
 
-    def __init__(self, output_folder='output'):
+    def __init__(self, output_folder='output', cache=None, state_store=None):
         self.models = {}
         self.output_folder = output_folder
+        self.cache = cache
+        self.state_store = state_store
+        self.series_params = {}
+        self.staged_forecasts = {}
         if not os.path.exists(self.output_folder):
             os.makedirs(self.output_folder)
 
@@ -59,6 +152,50 @@ class ForecastingManager:
         """
         self.models[name] = model
 
+    def load_best_parameters(self, file_path):
+        """
+        Use the tuned orders of the best-parameters table per series.
+
+        Parameters:
+        -----------
+        file_path : str
+            The table written by `BestParameters.tune_all_series`.
+        """
+        self.series_params = {}
+        for row in pd.read_csv(file_path).to_dict('records'):
+            arguments = {'order': ast.literal_eval(row['order'])}
+            if isinstance(row['seasonal_order'], str):
+                arguments['seasonal_order'] = ast.literal_eval(row['seasonal_order'])
+            self.series_params[(row['Dataset'], row['Model'], row['Column'])] = arguments
+
+    def model_for(self, model_name, base_name, column):
+        """
+        Return the model to use for a specific series.
+
+        The registered model is used as is, unless the best-parameters table
+        has arguments for the series, in which case a copy built with them
+        is returned.
+
+        Parameters:
+        -----------
+        model_name : str
+            The name of a registered model.
+        base_name : str
+            The dataset name (e.g. "sixteen_and_over").
+        column : str
+            The name of the column to forecast.
+
+        Returns:
+        --------
+        BaseForecastModel
+            The model for the series.
+        """
+        model = self.models[model_name]
+        overrides = self.series_params.get((base_name, model_name, column))
+        if not overrides:
+            return model
+        return type(model)(**{**model.get_params(), **overrides})
+
     @staticmethod
     def load_data(file_path):
         """
@@ -78,7 +215,7 @@ class ForecastingManager:
 
 
 
-    def forecast_column(self, model, data, column_name, periods=60):
+    def forecast_column(self, model, data, column_name, periods=60, series_key=None):
         """
         Forecast a specific column using the provided model.
 
@@ -92,6 +229,9 @@ class ForecastingManager:
             The name of the column to forecast.
         periods : int, optional
             The number of periods to forecast, default is 60.
+        series_key : str, optional
+            Unique name of the series in the state store; without it the
+            model is always fitted from scratch.
 
         Returns:
         --------
@@ -100,12 +240,37 @@ class ForecastingManager:
         """
         # Prepare the data: convert 'Start Date' to datetime and create the series
         data['Start Date'] = pd.to_datetime(data['Start Date'])
+
+        if self.cache is None:
+            return self._fit_and_forecast(model, data, column_name, periods, series_key)[1]
+
+        key = ForecastCache.make_key(
+            model, data['Start Date'], data[column_name], periods)
+        entry = self.cache.get(key)
+        if entry is not None:
+            fitted_model, forecast_df = entry
+            # Leave the model in the same state a fresh fit would
+            model.model = fitted_model.model
+            return forecast_df
+
+        fitted_model, forecast_df = self._fit_and_forecast(
+            model, data, column_name, periods, series_key)
+        self.cache.put(key, fitted_model, forecast_df)
+        return forecast_df
+
+    def _fit_and_forecast(self, model, data, column_name, periods, series_key=None):
+        """
+        Fit the model and build its forecast, bypassing the cache.
+
+        Returns the fitted model alongside the forecast; Prophet is fitted
+        on a fresh instance, which is the one returned.
+        """
         X = data[['Start Date']]
         y = data[column_name]
 
-        # Check for Prophet model
-        if isinstance(model, ProphetModel):
-            prophet_model = ProphetModel()
+        # Prophet is fitted on a ds/y frame
+        if model.data_format == 'prophet':
+            prophet_model = type(model)()
             df = data[['Start Date', column_name]].rename(
                 columns={'Start Date': 'ds', column_name: 'y'})
             df['ds'] = pd.to_datetime(df['ds'])
@@ -120,10 +285,10 @@ class ForecastingManager:
             actual_values = df['y'].tolist()
             forecast['Actual'] = actual_values + [None] * (forecast.shape[0] - len(actual_values))
 
-            return forecast
+            return prophet_model, forecast
 
         # For Darts-based models: LSTM
-        elif isinstance(model, (LSTMModel)):
+        elif model.data_format == 'dates':
             # Convert the data to a TimeSeries object (required for Darts models)
             # series = TimeSeries.from_dataframe(data, 'Start Date', column_name)
 
@@ -165,23 +330,26 @@ class ForecastingManager:
             # Concatenate historical data and forecast
             combined_df = pd.concat([historical_df, forecast_df], ignore_index=True)
 
-            return combined_df
+            return model, combined_df
 
         # Other traditional models like Linear Regression
         else:
-            X = np.array(pd.to_datetime(data['Start Date']).map(datetime.toordinal)).reshape(-1, 1)
+            X = to_ordinals(data['Start Date']).reshape(-1, 1)
             y = data[column_name].values
-            fit_model = model.fit(X, y)
+            if self.state_store is not None and series_key is not None:
+                fit_model = self.state_store.fit_or_update(series_key, model, X, y)
+            else:
+                fit_model = model.fit(X, y)
 
             # Use the same future dates as Prophet's future dates
             last_date = data['Start Date'].max()
             future_dates = pd.date_range(start=last_date, periods=periods + 1, freq='ME')[1:]
-            future_X = np.array(future_dates.map(datetime.toordinal)).reshape(-1, 1)
+            future_X = to_ordinals(future_dates).reshape(-1, 1)
             predictions = model.predict(future_X)
             print('---------------------------------')
             print(fit_model.__class__.__name__)
             # Create DataFrame for future dates and predictions
-            if isinstance(model, LinearRegressionModel)==False:
+            if model.jitter:
                 for i in range(len(predictions)):
                     predictions[i] = predictions[i]*random.uniform(0.995, 1.005)
                     
@@ -190,7 +358,7 @@ class ForecastingManager:
                 'Prediction': predictions
             })
             
-            if isinstance(model, LinearRegressionModel)==True or isinstance(model, XGBoostModel)==True:
+            if model.in_sample == 'predict':
                 predictions = model.predict(X)
             else:
                 predictions = fit_model.fittedvalues
@@ -206,7 +374,7 @@ class ForecastingManager:
             # Concatenate historical data and forecast
             combined_df = pd.concat([historical_df, forecast_df], ignore_index=True)
 
-            return combined_df
+            return model, combined_df
 
 
 
@@ -227,14 +395,16 @@ class ForecastingManager:
         dict
             A dictionary containing RMSE, MAE, and MAPE.
         """
+        y_true = np.asarray(y_true, dtype=float)
+        y_pred = np.asarray(y_pred, dtype=float)
         metrics = {
-            'RMSE': np.sqrt(mean_squared_error(y_true, y_pred)),
-            'MAE': mean_absolute_error(y_true, y_pred),
+            'RMSE': np.sqrt(np.mean((y_true - y_pred) ** 2)),
+            'MAE': np.mean(np.abs(y_true - y_pred)),
             'MAPE': np.mean(np.abs((y_true - y_pred) / y_true)) * 100
         }
         return metrics
 
-    def save_forecast(self, df, output_file):
+    def save_forecast(self, df, output_file, key=None):
         """
         Save the forecast data to a CSV file.
 
@@ -244,10 +414,199 @@ class ForecastingManager:
             The forecast data.
         output_file : str
             The path to the output CSV file.
+        key : tuple, optional
+            (dataset, model, column) under which the forecast is staged for
+            the consolidated forecast store.
         """
         df.to_csv(output_file, index=False)
+        if key is not None:
+            self.staged_forecasts[key] = df
+
+    def flush_forecasts(self):
+        """
+        Write the staged forecasts to the consolidated forecast store.
+
+        The store is rewritten once per run rather than once per series;
+        forecasts of series that were not part of the run are kept.
+        """
+        if self.staged_forecasts:
+            store = ForecastStore(self.output_folder)
+            if not store.exists():
+                # Keep the forecasts that earlier runs only wrote as CSV files
+                store.import_csv_files(list(DATASETS), list(MODEL_REGISTRY))
+            store.write(self.staged_forecasts)
+            self.staged_forecasts = {}
+
+    def expand_tasks(self, file_paths, columns=None):
+        """
+        Expand the run into independent (dataset, model, column) tasks.
+
+        Parameters:
+        -----------
+        file_paths : list of str
+            List of file paths to load the data from.
+        columns : list of str, optional
+            Only forecast these columns; every column by default.
+
+        Returns:
+        --------
+        list of tuple
+            Tasks as (file_path, model_name, column) in the same order the
+            serial run visits them.
+        """
+        tasks = []
+        for file_path in file_paths:
+            # Only the header is needed to know which columns to forecast
+            header = pd.read_csv(file_path, nrows=0).columns
+            for model_name in self.models:
+                # Assuming first three columns are identifiers (Start Date,
+                # etc.)
+                for column in header[3:]:
+                    if columns is None or column in columns:
+                        tasks.append((file_path, model_name, column))
+        return tasks
+
+    def run_task(self, file_path, model_name, column, periods=60):
+        """
+        Forecast a single (dataset, model, column) task.
+
+        Parameters:
+        -----------
+        file_path : str
+            The path to the CSV file holding the series.
+        model_name : str
+            The name of a registered model.
+        column : str
+            The name of the column to forecast.
+        periods : int, optional
+            The number of periods to forecast, default is 60.
+
+        Returns:
+        --------
+        pd.DataFrame
+            The forecasted data with actual values.
+        """
+        data = self.load_data(file_path)
+        base_name = os.path.basename(file_path).split('.')[0]
+        return self.forecast_column(
+            self.model_for(model_name, base_name, column), data, column, periods,
+            series_key=f"{base_name}_{model_name}_{column}")
+
+    def is_panel_task(self, task):
+        """
+        Check whether a task can be forecast together with the other
+        series of its model (see `run_panel`).
+        """
+        return (self.models[task[1]].supports_panel
+                and self.task_key(task) not in self.series_params)
+
+    def run_panel(self, model_name, tasks, periods=60):
+        """
+        Forecast many series of a model at once.
+
+        The series of all the datasets sharing the same dates are stacked
+        as the columns of one matrix and forecast by a single call of the
+        model's `forecast_panel`, instead of one fit per series.
 
-    def run_forecast(self, file_paths, periods=60):
+        Parameters:
+        -----------
+        model_name : str
+            The name of a registered model supporting panel forecasts.
+        tasks : list of tuple
+            (file_path, model_name, column) tasks of that model.
+        periods : int, optional
+            The number of periods to forecast, default is 60.
+
+        Returns:
+        --------
+        list of pd.DataFrame
+            The forecasted data with actual values and prediction
+            intervals, in the order of `tasks`.
+        """
+        model = self.models[model_name]
+        data = {file_path: self.load_data(file_path) for file_path in dict.fromkeys(t[0] for t in tasks)}
+        ordinals = {file_path: to_ordinals(df['Start Date']) for file_path, df in data.items()}
+
+        # Datasets are stacked together when their dates are identical
+        groups = {}
+        for index, task in enumerate(tasks):
+            groups.setdefault(ordinals[task[0]].tobytes(), []).append(index)
+
+        results = [None] * len(tasks)
+        for indices in groups.values():
+            file_path = tasks[indices[0]][0]
+            # Panels of a run are told apart, e.g. for the checkpoint of
+            # each, only when there are several
+            name = None
+            if len(groups) > 1:
+                name = '+'.join(dict.fromkeys(os.path.basename(tasks[i][0]).split('.')[0] for i in indices))
+            dates = pd.to_datetime(data[file_path]['Start Date'])
+            future_dates = pd.date_range(start=dates.max(), periods=periods + 1, freq='ME')[1:]
+            Y = np.column_stack([data[tasks[i][0]][tasks[i][2]].to_numpy(dtype=np.float64)
+                                 for i in indices])
+            panel = model.forecast_panel(ordinals[file_path].reshape(-1, 1), Y,
+                                         to_ordinals(future_dates).reshape(-1, 1), name=name)
+            forecast, lower, upper = panel['forecast'], panel['lower'], panel['upper']
+            if model.jitter:
+                # The bounds move with their forecast, so it stays inside them
+                factor = np.random.uniform(0.995, 1.005, size=forecast.shape)
+                forecast, lower, upper = forecast * factor, lower * factor, upper * factor
+            print(f"{model_name}: {len(indices)} series forecast in one panel")
+
+            for j, index in enumerate(indices):
+                historical_df = pd.DataFrame({
+                    'Start Date': dates,
+                    'Prediction': panel['fitted'][:, j],
+                    'Actual': Y[:, j]
+                })
+                forecast_df = pd.DataFrame({
+                    'Start Date': future_dates,
+                    'Prediction': forecast[:, j],
+                    'Lower': lower[:, j],
+                    'Upper': upper[:, j]
+                })
+                results[index] = pd.concat([historical_df, forecast_df], ignore_index=True)
+        return results
+
+    def collect_metrics(self, forecast_df, model_name, column, dataset=None):
+        """
+        Calculate the metrics of a forecast over its actual vs predicted part.
+
+        Parameters:
+        -----------
+        forecast_df : pd.DataFrame
+            The forecast returned by `forecast_column`.
+        model_name : str
+            The name of the model that produced the forecast.
+        column : str
+            The name of the forecasted column.
+        dataset : str, optional
+            The name of the dataset the column belongs to.
+
+        Returns:
+        --------
+        dict
+            The metrics tagged with the dataset, model and column names.
+        """
+        y_true = forecast_df['Actual'].dropna().values
+        y_pred = forecast_df['yhat'].dropna(
+        ).values if 'yhat' in forecast_df else forecast_df['Prediction'].dropna().values
+
+        # Align lengths
+        if len(y_true) > len(y_pred):
+            y_true = y_true[-len(y_pred):]
+        elif len(y_pred) > len(y_true):
+            y_pred = y_pred[-len(y_true):]
+
+        metrics = self.calculate_metrics(y_true, y_pred)
+        metrics['Model'] = model_name
+        metrics['Column'] = column
+        if dataset is not None:
+            metrics['Dataset'] = dataset
+        return metrics
+
+    def run_forecast(self, file_paths, periods=60, n_jobs=1, model_concurrency=None, columns=None,
+                     results_lock=None, resume=False, panel=True):
         """
         Run the forecasting process for all models and save results.
 
@@ -257,57 +616,343 @@ class ForecastingManager:
             List of file paths to load the data from.
         periods : int, optional
             The number of periods to forecast, default is 60.
+        n_jobs : int, optional
+            The number of worker processes. 1 (the default) runs every task
+            serially in this process; None uses one worker per CPU.
+        model_concurrency : dict, optional
+            Maximum number of tasks of a model that may run at the same
+            time, e.g. {'lstm': 1} keeps torch to a single slot. Models not
+            listed may use every worker.
+        columns : list of str, optional
+            Only forecast these columns; every column by default.
+        results_lock : threading.Lock, optional
+            Held while the results are merged into the shared outputs, for
+            runs made concurrently in the same process.
+        resume : bool, optional
+            Skip the tasks the task ledger records as done with the same
+            data, model parameters and horizon, e.g. after a crash.
+        panel : bool, optional
+            Forecast the series of models supporting it all at once (see
+            `run_panel`), default is True.
+        """
+        tasks = self.expand_tasks(file_paths, columns)
+        ledger = TaskLedger(os.path.join(self.output_folder, 'task_ledger.jsonl'))
+        data_hashes = {file_path: self.file_hash(file_path) for file_path in file_paths}
+        fingerprints = {task: self.task_fingerprint(task, data_hashes[task[0]], periods)
+                        for task in tasks}
+
+        todo = tasks
+        if resume:
+            completed = ledger.completed()
+            todo = []
+            for task in tasks:
+                entry = completed.get(self.task_key(task))
+                if (entry is None or entry['fingerprint'] != fingerprints[task]
+                        or not os.path.exists(entry['output'])):
+                    todo.append(task)
+            print(f"Resuming: {len(tasks) - len(todo)} of {len(tasks)} tasks already done")
+
+        def finish(task, forecast_df):
+            # Saved and recorded as soon as the task is done, so a crash
+            # only loses the tasks still running
+            base_name, model_name, column = self.task_key(task)
+            output_file = os.path.join(
+                self.output_folder, f"{base_name}_{model_name}_{column}_forecast.csv")
+            self.save_forecast(forecast_df, output_file, key=(base_name, model_name, column))
+            metrics = self.collect_metrics(forecast_df, model_name, column)
+            ledger.record((base_name, model_name, column), fingerprints[task], output_file,
+                          {name: metrics[name] for name in ('RMSE', 'MAE', 'MAPE')})
+
+        if panel:
+            panel_tasks = [task for task in todo if self.is_panel_task(task)]
+            todo = [task for task in todo if not self.is_panel_task(task)]
+            for model_name in dict.fromkeys(task[1] for task in panel_tasks):
+                model_tasks = [task for task in panel_tasks if task[1] == model_name]
+                for task, forecast_df in zip(model_tasks, self.run_panel(model_name, model_tasks, periods)):
+                    finish(task, forecast_df)
+
+        if n_jobs == 1:
+            for task in todo:
+                finish(task, self.run_task(*task, periods=periods))
+        else:
+            self._run_parallel(todo, periods, n_jobs, model_concurrency or {}, on_result=finish)
+
+        with results_lock or contextlib.nullcontext():
+            self.save_results(tasks, ledger)
+
+    @staticmethod
+    def task_key(task):
+        """
+        Return the (dataset, model, column) key of a task.
+        """
+        file_path, model_name, column = task
+        return os.path.basename(file_path).split('.')[0], model_name, column
+
+    @staticmethod
+    def file_hash(file_path):
+        """
+        Return the sha256 of a file.
+        """
+        with open(file_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def task_fingerprint(self, task, data_hash, periods):
+        """
+        Describe what the forecast of a task is computed from.
+
+        Returns:
+        --------
+        dict
+            The hash of the input data, the model class and parameters and
+            the horizon, in JSON types.
+        """
+        base_name, model_name, column = self.task_key(task)
+        model = self.model_for(model_name, base_name, column)
+        fingerprint = {'data': data_hash, 'model': type(model).__name__,
+                       'params': model.get_params(), 'periods': periods}
+        return json.loads(json.dumps(fingerprint, default=str))
+
+    def save_results(self, tasks, ledger):
         """
+        Publish the forecasts of a run and merge its metrics.
+
+        Parameters:
+        -----------
+        tasks : list of tuple
+            The (file_path, model_name, column) tasks of the run.
+        ledger : TaskLedger
+            The ledger holding the metrics and output file of every task.
+        """
+        completed = ledger.completed()
+        # Results are published in task order so the output does not depend
+        # on which worker finished first
         metrics_comparison = []
+        for task in tasks:
+            key = self.task_key(task)
+            entry = completed[key]
+            if key not in self.staged_forecasts:
+                # Done by the run that was resumed
+                self.staged_forecasts[key] = pd.read_csv(entry['output'])
+            metrics_comparison.append({**entry['metrics'], 'Model': key[1],
+                                       'Column': key[2], 'Dataset': key[0]})
+
+        self.flush_forecasts()
+        self.save_metrics(metrics_comparison)
+        ledger.compact()
+
+    def save_metrics(self, metrics_comparison):
+        """
+        Merge the metrics of a run into metrics_comparison.csv.
 
-        for file_path in file_paths:
-            data = self.load_data(file_path)
-            base_name = os.path.basename(file_path).split('.')[0]
+        The rows of the (dataset, model, column) keys of the run replace the
+        existing ones and every other row is kept, so a run over a subset
+        of the series does not drop the metrics of the rest.
 
-            for model_name, model in self.models.items():
-                # Assuming first three columns are identifiers (Start Date,
-                # etc.)
-                for column in data.columns[3:]:
-                    forecast_df = self.forecast_column(
-                        model, data, column, periods)
-                    output_file = os.path.join(
-                        self.output_folder, f"{base_name}_{model_name}_{column}_forecast.csv")
-                    self.save_forecast(forecast_df, output_file)
-
-                    # Calculate metrics only for actual vs predicted part
-                    y_true = forecast_df['Actual'].dropna().values
-                    y_pred = forecast_df['yhat'].dropna(
-                    ).values if 'yhat' in forecast_df else forecast_df['Prediction'].dropna().values
-
-                    # Align lengths
-                    if len(y_true) > len(y_pred):
-                        y_true = y_true[-len(y_pred):]
-                    elif len(y_pred) > len(y_true):
-                        y_pred = y_pred[-len(y_true):]
-
-                    metrics = self.calculate_metrics(y_true, y_pred)
-                    metrics['Model'] = model_name
-                    metrics['Column'] = column
-                    metrics_comparison.append(metrics)
-
-        # Save the metrics comparison
+        Parameters:
+        -----------
+        metrics_comparison : list of dict
+            The metrics returned by `collect_metrics`.
+        """
+        metrics_file = os.path.join(self.output_folder, "metrics_comparison.csv")
         metrics_df = pd.DataFrame(metrics_comparison)
-        metrics_df.to_csv(
-            os.path.join(
-                self.output_folder,
-                "metrics_comparison.csv"),
-            index=False)
-
-
-# Example usage:
-manager = ForecastingManager(output_folder='model_results')
-manager.add_model('linear_regression', LinearRegressionModel())
-manager.add_model('prophet', ProphetModel())
-manager.add_model('arima', ARIMAModel(order=(2, 0, 2)))
-manager.add_model('sarima', SARIMAModel(order=(3, 0, 0), seasonal_order=(0, 1, 0, 12)))
-manager.add_model('holt_winters', HoltWintersModel(trend='add'))
-manager.add_model('xgboost', XGBoostModel())
-manager.add_model('lstm', LSTMModel(input_chunk_length=12, output_chunk_length=6, n_epochs=1))
-
-manager.run_forecast(['processed/sixteen_and_over.csv',
-                     'processed/sixteen_and_sixty_four.csv'], periods=60)
+        if os.path.exists(metrics_file):
+            existing = pd.read_csv(metrics_file)
+            if 'Dataset' not in existing.columns:
+                existing = FileHandler.infer_metric_datasets(existing, self.dataset_columns())
+            metrics_df = pd.concat([existing, metrics_df], ignore_index=True).drop_duplicates(
+                ['Dataset', 'Model', 'Column'], keep='last')
+        metrics_df.to_csv(metrics_file, index=False)
+
+    @staticmethod
+    def dataset_columns():
+        """
+        Return the forecasted columns of every dataset of DATASETS.
+        """
+        return {dataset: list(pd.read_csv(file_path, nrows=0).columns[3:])
+                for dataset, file_path in DATASETS.items() if os.path.exists(file_path)}
+
+    def _run_parallel(self, tasks, periods, n_jobs, model_concurrency, on_result=None):
+        """
+        Run tasks on a process pool, honouring the per-model limits.
+
+        `on_result(task, forecast_df)` is called in this process as soon as
+        a task finishes. Returns the forecasts in the same order as `tasks`.
+        """
+        n_jobs = n_jobs or os.cpu_count() or 1
+        results = [None] * len(tasks)
+        pending = deque(enumerate(tasks))
+        running = {}
+        in_flight = {name: 0 for name in self.models}
+
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(self,)) as executor:
+            while pending or running:
+                # Submit every waiting task whose model still has a free slot
+                for _ in range(len(pending)):
+                    if len(running) >= n_jobs:
+                        break
+                    index, task = pending.popleft()
+                    model_name = task[1]
+                    limit = max(1, model_concurrency.get(model_name, n_jobs))
+                    if in_flight[model_name] >= limit:
+                        pending.append((index, task))
+                        continue
+                    future = executor.submit(_run_worker_task, task, periods)
+                    running[future] = (index, model_name)
+                    in_flight[model_name] += 1
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, model_name = running.pop(future)
+                    in_flight[model_name] -= 1
+                    results[index] = future.result()
+                    if on_result is not None:
+                        on_result(tasks[index], results[index])
+
+        return results
+
+
+# Manager shared by the tasks of a worker process, set by _init_worker
+_worker_manager = None
+
+
+def _init_worker(manager):
+    """
+    Keep the manager (and its models) in the worker so it is sent only once.
+    """
+    global _worker_manager
+    _worker_manager = manager
+
+
+def _run_worker_task(task, periods):
+    """
+    Run a single (file_path, model_name, column) task in a worker process.
+    """
+    return _worker_manager.run_task(*task, periods=periods)  # type: ignore
+
+
+def create_manager(model_names=None, output_folder='model_results', model_arguments=None):
+    """
+    Create the manager of the forecasting run.
+
+    The fitted models are cached in fit_cache/ and model_state/, and the
+    orders tuned per series by `python BestParameters.py --all` are used
+    when model_params/best_parameters.csv exists and one of TUNED_MODELS
+    is registered.
+
+    Parameters:
+    -----------
+    model_names : list of str, optional
+        The models to register; every model of MODEL_REGISTRY by default.
+        Only these models are created, and so imported.
+    output_folder : str, optional
+        Where the results are written, default is 'model_results'.
+    model_arguments : dict, optional
+        Arguments overriding the registered defaults, keyed by model name,
+        e.g. {'lstm': {'max_time': 300}}.
+
+    Returns:
+    --------
+    ForecastingManager
+        The manager.
+    """
+    manager = ForecastingManager(output_folder=output_folder,
+                                 cache=ForecastCache(cache_dir='fit_cache'),
+                                 state_store=ModelStateStore(state_dir='model_state',
+                                                             full_refit_every=12))
+    model_names = model_names or list(MODEL_REGISTRY)
+    for model_name in model_names:
+        manager.add_model(model_name, create_model(model_name, **(model_arguments or {}).get(model_name, {})))
+    # Not read otherwise, as the table may be rewritten by a tuning run
+    if any(name in TUNED_MODELS for name in model_names) and os.path.exists('model_params/best_parameters.csv'):
+        manager.load_best_parameters('model_params/best_parameters.csv')
+    return manager
+
+
+def add_model_options(parser):
+    """
+    Add the command line options of `model_arguments` to a parser; shared
+    by the forecasting command and the build pipeline.
+    """
+    parser.add_argument('--holt-winters-backend', choices=['statsmodels', 'numpy'], default='statsmodels',
+                        help="Fit Holt-Winters series by series with statsmodels, or all at "
+                             "once with NumPy from heuristic initial states, an approximation "
+                             "(default: statsmodels)")
+    parser.add_argument('--lstm-threads', type=int, default=None,
+                        help="Torch threads used to train the LSTM (default: torch's own, or the "
+                             "worker processes of the build pipeline)")
+    parser.add_argument('--lstm-max-time', type=int, default=None,
+                        help="Wall-clock seconds allowed per LSTM training run (default: 600)")
+    return parser
+
+
+def model_arguments(results_dir, holt_winters_backend='statsmodels', lstm_threads=None, lstm_max_time=None):
+    """
+    Return the model arguments of a forecasting run, for `create_manager`.
+
+    The forecasting command and the build pipeline both take their model
+    arguments from here, so they produce the same results from the same
+    inputs.
+
+    Parameters:
+    -----------
+    results_dir : str
+        The results directory of the run; the trained LSTM is saved there,
+        published with the results it produced, and the previous release's
+        network found there is warm-started from.
+    holt_winters_backend : str, optional
+        'statsmodels' or 'numpy', default is 'statsmodels'.
+    lstm_threads : int, optional
+        Torch threads of the LSTM; torch's own default when None.
+    lstm_max_time : int, optional
+        Wall-clock seconds per LSTM training run; the registered default
+        when None.
+
+    Returns:
+    --------
+    dict
+        Arguments keyed by model name.
+    """
+    # One checkpoint per run, or per panel when the datasets have different
+    # dates (see LSTMModel.checkpoint_file)
+    lstm = {'checkpoint_path': os.path.join(results_dir, 'lstm_global.pt'), 'n_threads': lstm_threads}
+    if lstm_max_time is not None:
+        lstm['max_time'] = lstm_max_time
+    return {'holt_winters': {'backend': holt_winters_backend}, 'lstm': lstm}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Forecast the processed labour market series.")
+    parser.add_argument('--dataset', action='append', choices=sorted(DATASETS),
+                        help="Dataset to forecast; repeat for several (default: all)")
+    parser.add_argument('--model', action='append', choices=sorted(MODEL_REGISTRY),
+                        help="Model to run; repeat for several (default: all)")
+    parser.add_argument('--column', action='append',
+                        help="Column to forecast; repeat for several (default: all)")
+    parser.add_argument('--periods', type=int, default=60,
+                        help="Number of months to forecast (default: 60)")
+    parser.add_argument('--jobs', type=int, default=None,
+                        help="Worker processes (default: one per CPU)")
+    add_model_options(parser)
+    parser.add_argument('--resume', action='store_true',
+                        help="Skip the tasks already completed by an interrupted run")
+    return parser.parse_args(argv)
+
+
+# Example usage: python LabourForecastModels.py --model arima --column "Unemployment rate"
+# The guard keeps worker processes from re-running the example on import
+if __name__ == "__main__":
+    args = parse_args()
+    # The run writes into a staging copy of the published results, which
+    # readers only see once it is complete and published
+    publisher = ResultsPublisher('model_results', keep=5)
+    staging = publisher.stage(resume=args.resume)
+    manager = create_manager(args.model, output_folder=staging,
+                             model_arguments=model_arguments(staging, args.holt_winters_backend,
+                                                             args.lstm_threads, args.lstm_max_time))
+    manager.run_forecast([DATASETS[name] for name in args.dataset or DATASETS],
+                         periods=args.periods, n_jobs=args.jobs,
+                         model_concurrency={'lstm': 1}, columns=args.column,
+                         resume=args.resume)
+    publisher.publish(staging)
@@ -133,6 +133,7 @@ class LabourSurveyDataPrep:
 
 
 # Example usage:
-data_prep = LabourSurveyDataPrep(file_path='input/a01aug2024.xls',
-                                 sheet_name='1', output_folder='processed')
-data_prep.run()
+if __name__ == "__main__":
+    data_prep = LabourSurveyDataPrep(file_path='input/a01aug2024.xls',
+                                     sheet_name='1', output_folder='processed')
+    data_prep.run()
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import pickle
+import numpy as np
+
+
+class ModelStateStore:
+    """
+    Persist fitted models between runs so that a new data release can be
+    absorbed incrementally.
+
+    For every series the store keeps the fitted model, the number of rows
+    it was fitted on, a hash of those rows and the number of incremental
+    updates applied since the last full fit. When a later run sees the
+    same rows followed by new ones, models that support it are extended at
+    their fitted parameters instead of being re-optimized. A revision of
+    any earlier row, a change of hyperparameters or of the model code (see
+    BaseForecastModel.code_version) or reaching `full_refit_every` releases
+    triggers a full refit.
+
+    Attributes:
+    -----------
+    state_dir : str
+        Directory holding one pickle per series.
+    full_refit_every : int
+        A full refit is forced on every N-th release; 1 disables the
+        incremental path.
+
+    Methods:
+    --------
+    fit_or_update(series_key, model, X, y):
+        Fit the model, or update it from its saved state when possible.
+    """
+
+    def __init__(self, state_dir='model_state', full_refit_every=12):
+        self.state_dir = state_dir
+        self.full_refit_every = full_refit_every
+        if not os.path.exists(self.state_dir):
+            os.makedirs(self.state_dir)
+
+    @staticmethod
+    def _hash_rows(y):
+        return hashlib.sha256(
+            np.ascontiguousarray(y, dtype=np.float64).tobytes()).hexdigest()
+
+    def _path(self, series_key):
+        return os.path.join(self.state_dir, f"{series_key}.pkl")
+
+    def load(self, series_key):
+        """
+        Return the saved state of a series, or None if there is none.
+        """
+        try:
+            with open(self._path(series_key), 'rb') as f:
+                return pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def save(self, series_key, model, y, releases):
+        """
+        Save the fitted model of a series together with the rows it has seen.
+        """
+        state = {
+            'model_class': type(model).__name__,
+            'params': model.get_params(),
+            'code_version': type(model).code_version(),
+            'fitted': model.model,
+            'n_rows': len(y),
+            'rows_hash': self._hash_rows(y),
+            'releases': releases,
+        }
+        path = self._path(series_key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def can_update(self, state, model, y):
+        """
+        Check whether the saved state can be extended with the rows of `y`.
+        """
+        if state is None or not model.supports_update:
+            return False
+        if state['model_class'] != type(model).__name__ or state['params'] != model.get_params():
+            return False
+        if state.get('code_version') != type(model).code_version():
+            # Fitted by other code, e.g. before a change of the fitting
+            return False
+        n_rows = state['n_rows']
+        if len(y) < n_rows or self._hash_rows(y[:n_rows]) != state['rows_hash']:
+            # Rows were removed or revised, so the old fit no longer applies
+            return False
+        new_release = len(y) > n_rows
+        return not new_release or state['releases'] + 1 < self.full_refit_every
+
+    def fit_or_update(self, series_key, model, X, y):
+        """
+        Fit the model, or update it from its saved state when possible.
+
+        Parameters:
+        -----------
+        series_key : str
+            Unique name of the series, e.g. "<dataset>_<model>_<column>".
+        model : BaseForecastModel
+            The model to fit.
+        X : array-like
+            The features of the whole history.
+        y : array-like
+            The values of the whole history.
+
+        Returns:
+        --------
+        object
+            The fitted estimator, as returned by `model.fit`.
+        """
+        if not model.supports_update:
+            return model.fit(X, y)
+
+        state = self.load(series_key)
+        if self.can_update(state, model, y):
+            model.model = state['fitted']  # type: ignore
+            fit_model = model.update(X, y)
+            releases = state['releases'] + (1 if len(y) > state['n_rows'] else 0)  # type: ignore
+        else:
+            fit_model = model.fit(X, y)
+            releases = 0
+
+        self.save(series_key, model, y, releases)
+        return fit_model
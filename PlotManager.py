@@ -1,3 +1,7 @@
+import base64
+import json
+import numpy as np
+import pandas as pd
 import plotly.graph_objs as go
 
 class PlotManager:
@@ -7,7 +11,7 @@ class PlotManager:
     def __init__(self):
         pass
 
-    def create_plot(self, df, column_name):
+    def create_plot(self, df, column_name, max_points=None, x_range=None):
         """
         Create a plot with original and forecasted values.
 
@@ -17,6 +21,12 @@ class PlotManager:
             The DataFrame containing the data.
         column_name : str
             The name of the column to plot.
+        max_points : int, optional
+            Point budget per trace, typically the plot width in pixels.
+            Longer traces are downsampled with LTTB.
+        x_range : tuple of str, optional
+            Date range the user zoomed into; only points inside it are
+            used, so zooming recovers the full resolution.
 
         Returns:
         --------
@@ -26,9 +36,10 @@ class PlotManager:
         fig = go.Figure()
 
         # Add original values
+        x, y = self.downsample(df['Start Date'], df['Actual'], max_points, x_range)
         fig.add_trace(go.Scatter(
-            x=df['Start Date'],
-            y=df['Actual'],
+            x=x,
+            y=y,
             mode='lines',
             name='Actual'
         ))
@@ -42,16 +53,18 @@ class PlotManager:
         )
         # Add forecasted values
         if 'yhat' in df.columns:
+            x, y = self.downsample(df['Start Date'], df['yhat'], max_points, x_range)
             fig.add_trace(go.Scatter(
-                x=df['Start Date'],
-                y=df['yhat'],
+                x=x,
+                y=y,
                 mode='lines',
                 name='Forecast'
             ))
         else:
+            x, y = self.downsample(df['Start Date'], df['Prediction'], max_points, x_range)
             fig.add_trace(go.Scatter(
-                x=df['Start Date'],
-                y=df['Prediction'],
+                x=x,
+                y=y,
                 mode='lines',
                 name='Forecast'
             ))
@@ -61,5 +74,299 @@ class PlotManager:
             xaxis_title='Date',
             yaxis_title=column_name
         )
+        if x_range is not None:
+            # Only the refined figure of a zoom keeps the user's view; a new
+            # selection resets it, as figures without uirevision do
+            fig.update_layout(xaxis_range=list(x_range), uirevision=column_name)
 
         return fig
+
+    def create_overlay_plot(self, df, column_name, max_points=None):
+        """
+        Create a plot overlaying the forecasts of several models.
+
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            The forecasts in long format, with 'Model', 'Start Date',
+            'Prediction' and 'Actual' columns.
+        column_name : str
+            The name of the column to plot.
+        max_points : int, optional
+            Point budget per trace, see `create_plot`.
+
+        Returns:
+        --------
+        go.Figure
+            The Plotly figure with the actual values and one forecast trace
+            per model.
+        """
+        fig = go.Figure()
+        if df.empty:
+            return fig
+
+        # The actual values are the same for every model, take the longest
+        models = df.groupby('Model', sort=False)
+        actual = max((group for _, group in models), key=lambda group: group['Actual'].notna().sum())
+        x, y = self.downsample(actual['Start Date'], actual['Actual'], max_points)
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=y,
+            mode='lines',
+            name='Actual',
+            line=dict(color='black', width=3)
+        ))
+
+        fig.add_shape(
+            type="line",
+            x0="2024-04-01", x1="2024-04-01",
+            y0=0, y1=1,
+            xref="x", yref="paper",
+            line=dict(color="Red", width=2, dash="dash")
+        )
+        for model_name, group in models:
+            x, y = self.downsample(group['Start Date'], group['Prediction'], max_points)
+            fig.add_trace(go.Scatter(
+                x=x,
+                y=y,
+                mode='lines',
+                name=model_name
+            ))
+
+        fig.update_layout(
+            title=f'Forecasts of every model for {column_name}',
+            xaxis_title='Date',
+            yaxis_title=column_name
+        )
+        return fig
+
+    @staticmethod
+    def lttb(x, y, n_out):
+        """
+        Select points with Largest-Triangle-Three-Buckets.
+
+        The first and last points are kept; every bucket in between keeps
+        the point forming the largest triangle with the previously kept
+        point and the average of the next bucket, which preserves peaks and
+        the overall shape of the line.
+
+        Parameters:
+        -----------
+        x : np.ndarray
+            Increasing numeric x values.
+        y : np.ndarray
+            Finite y values.
+        n_out : int
+            Number of points to keep.
+
+        Returns:
+        --------
+        np.ndarray
+            Indices of the kept points.
+        """
+        n = len(x)
+        if n_out >= n or n_out < 3:
+            return np.arange(n)
+
+        edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+        indices = np.empty(n_out, dtype=np.int64)
+        indices[0], indices[-1] = 0, n - 1
+        a = 0
+        for i in range(n_out - 2):
+            start, end = edges[i], edges[i + 1]
+            next_end = edges[i + 2] if i + 2 < len(edges) else n
+            avg_x = x[end:next_end].mean()
+            avg_y = y[end:next_end].mean()
+            area = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                          - (x[a] - x[start:end]) * (avg_y - y[a]))
+            a = start + int(np.argmax(area))
+            indices[i + 1] = a
+        return indices
+
+    def downsample(self, dates, values, max_points=None, x_range=None):
+        """
+        Reduce a trace to the visible range and the point budget.
+
+        Parameters:
+        -----------
+        dates : pd.Series
+            The x values of the trace.
+        values : pd.Series
+            The y values of the trace.
+        max_points : int, optional
+            Point budget; no downsampling when None.
+        x_range : tuple of str, optional
+            Visible date range; the whole trace when None.
+
+        Returns:
+        --------
+        tuple
+            The x and y values to plot.
+        """
+        if max_points is None and x_range is None:
+            return dates, values
+
+        dates = pd.to_datetime(dates)
+        keep = values.notna().to_numpy().copy()
+        if x_range is not None:
+            start, end = pd.to_datetime(x_range[0]), pd.to_datetime(x_range[1])
+            inside = ((dates >= start) & (dates <= end)).to_numpy()
+            # One point either side keeps the line running to the plot edges,
+            # without wrapping around from one end of the trace to the other
+            padded = inside.copy()
+            padded[1:] |= inside[:-1]
+            padded[:-1] |= inside[1:]
+            keep &= padded
+        dates, values = dates[keep], values[keep]
+
+        if max_points is not None and len(values) > max_points:
+            x = dates.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64)
+            indices = self.lttb(x, values.to_numpy(dtype=np.float64), max_points)
+            dates, values = dates.iloc[indices], values.iloc[indices]
+        return dates, values
+
+    def create_population_plots(self, df, age_label, level_columns, rate_columns, max_points=None):
+        """
+        Create the population level and rate plots of an age group.
+
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            The processed data of the age group.
+        age_label : str
+            The age group shown in the titles (e.g. "16 & Over").
+        level_columns : list of str
+            The columns plotted on the levels figure.
+        rate_columns : list of str
+            The columns plotted on the rates figure.
+        max_points : int, optional
+            Point budget per trace, see `create_plot`.
+
+        Returns:
+        --------
+        tuple of go.Figure
+            The levels figure and the rates figure.
+        """
+        fig_levels = go.Figure()
+        for column in level_columns:
+            x, y = self.downsample(df['Start Date'], df[column], max_points)
+            fig_levels.add_trace(go.Scatter(
+                x=x,
+                y=y,
+                mode='lines+markers',
+                name=column))
+        fig_levels.update_layout(
+            title=f"Population Levels Over Time ({age_label})",
+            xaxis_title="Date",
+            yaxis_title="Population Levels")
+
+        fig_rates = go.Figure()
+        for column in rate_columns:
+            x, y = self.downsample(df['Start Date'], df[column], max_points)
+            fig_rates.add_trace(go.Scatter(
+                x=x,
+                y=y,
+                mode='lines+markers',
+                name=column))
+        fig_rates.update_layout(
+            title=f"Population Rates Over Time ({age_label})",
+            xaxis_title="Date",
+            yaxis_title="Rates (%)")
+
+        return fig_levels, fig_rates
+
+    @staticmethod
+    def figure_to_dict(fig):
+        """
+        Convert a figure into plain JSON types.
+
+        The result can be cached, shared between processes and returned from
+        a callback without Plotly having to encode pandas or NumPy data
+        again.
+
+        Parameters:
+        -----------
+        fig : go.Figure
+            The figure to convert.
+
+        Returns:
+        --------
+        dict
+            The figure as nested dictionaries and lists.
+        """
+        return json.loads(fig.to_json())
+
+    @staticmethod
+    def _decode_array(values):
+        """
+        Return the values of a trace array, decoding Plotly typed arrays.
+        """
+        if isinstance(values, dict) and 'bdata' in values:
+            return np.frombuffer(base64.b64decode(values['bdata']), dtype=np.dtype(values['dtype']))
+        return values
+
+    @staticmethod
+    def _encode_array(values):
+        """
+        Encode a NumPy array as a Plotly typed array (little-endian base64).
+        """
+        values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder('<'))
+        return {'dtype': values.dtype.str[1:], 'bdata': base64.b64encode(values.tobytes()).decode()}
+
+    def compact_figure(self, figure, decimals=3):
+        """
+        Shrink the data arrays of a figure dictionary.
+
+        Dates on the x axis are sent as epoch milliseconds and values are
+        rounded to `decimals` places, all as binary typed arrays. Values
+        use float32 whenever that keeps the rounding exact to half a unit
+        of the last decimal, and float64 otherwise.
+
+        Parameters:
+        -----------
+        figure : dict
+            A figure as returned by `figure_to_dict`.
+        decimals : int, optional
+            Number of decimal places kept, default is 3.
+
+        Returns:
+        --------
+        dict
+            The compacted figure.
+        """
+        figure = dict(figure)
+        figure['data'] = [dict(trace) for trace in figure.get('data', [])]
+        date_axis = False
+        tolerance = 0.5 * 10.0 ** -decimals
+
+        for trace in figure['data']:
+            x = self._decode_array(trace.get('x'))
+            if isinstance(x, list) and x and isinstance(x[0], str):
+                try:
+                    dates = pd.to_datetime(pd.Series(x))
+                except (ValueError, TypeError):
+                    dates = None
+                if dates is not None:
+                    epoch_ms = dates.to_numpy(dtype='datetime64[ms]').astype(np.int64).astype(np.float64)
+                    trace['x'] = self._encode_array(epoch_ms)
+                    date_axis = True
+
+            y = self._decode_array(trace.get('y'))
+            if y is None:
+                continue
+            try:
+                values = np.array(y, dtype=np.float64)
+            except (ValueError, TypeError):
+                continue
+            rounded = np.round(values, decimals)
+            single = rounded.astype(np.float32)
+            finite = np.isfinite(rounded)
+            error = np.max(np.abs(single[finite] - rounded[finite]), initial=0.0)
+            trace['y'] = self._encode_array(single if error <= tolerance else rounded)
+
+        if date_axis:
+            # Numbers on the x axis would otherwise be read as a linear axis
+            layout = dict(figure.get('layout', {}))
+            layout['xaxis'] = dict(layout.get('xaxis', {}), type='date')
+            figure['layout'] = layout
+        return figure
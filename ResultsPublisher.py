@@ -0,0 +1,247 @@
+import argparse
+import os
+import shutil
+import time
+import uuid
+
+
+class ResultsPublisher:
+    """
+    Versioned publication of the model results.
+
+    A forecasting run writes into its own staging directory, which starts
+    as a copy of the published results. Publishing moves it into
+    `versions/` and then swaps the `CURRENT` pointer file with an atomic
+    rename, so readers see either the previous or the new results, never a
+    mix of both and never a half-written file. Published versions are
+    never modified; the last `keep` are kept for rollback.
+
+    Before the first publication the results are read from the root
+    directory itself, as written by earlier releases.
+
+    Layout:
+    -------
+        <root>/CURRENT              id of the published version
+        <root>/versions/<id>/       published versions
+        <root>/staging/<id>/        version being written
+
+    Attributes:
+    -----------
+    root : str
+        The model results directory.
+    keep : int
+        Number of published versions kept.
+
+    Methods:
+    --------
+    current():
+        Return the id of the published version.
+    current_dir(version):
+        Return the directory holding a version.
+    stage(resume):
+        Create the staging directory of a new version.
+    publish(staging_path):
+        Publish a staged version.
+    rollback(version):
+        Point readers back to an earlier version.
+    """
+
+    POINTER_FILE = 'CURRENT'
+    BASE_FILE = 'BASE'
+    # Files of a results directory that belong to a run, not to the results
+    RUN_FILES = ('task_ledger.jsonl', BASE_FILE)
+
+    def __init__(self, root='model_results', keep=5):
+        self.root = root
+        self.keep = keep
+
+    @property
+    def pointer_path(self):
+        return os.path.join(self.root, self.POINTER_FILE)
+
+    @property
+    def versions_dir(self):
+        return os.path.join(self.root, 'versions')
+
+    @property
+    def staging_dir(self):
+        return os.path.join(self.root, 'staging')
+
+    def current(self):
+        """
+        Return the id of the published version, or None before the first
+        publication.
+        """
+        try:
+            with open(self.pointer_path) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def current_dir(self, version=None):
+        """
+        Return the directory holding a version.
+
+        Parameters:
+        -----------
+        version : str, optional
+            A version id; the published version by default.
+
+        Returns:
+        --------
+        str
+            The version directory, or the root directory when nothing has
+            been published yet.
+        """
+        version = version or self.current()
+        if version is None:
+            return self.root
+        return os.path.join(self.versions_dir, version)
+
+    def versions(self):
+        """
+        Return the ids of the published versions, oldest first.
+        """
+        if not os.path.exists(self.versions_dir):
+            return []
+        return sorted(os.listdir(self.versions_dir))
+
+    def open_staging(self):
+        """
+        Return the staging directory left by an unpublished run, or None.
+        """
+        if not os.path.exists(self.staging_dir):
+            return None
+        for name in sorted(os.listdir(self.staging_dir), reverse=True):
+            path = os.path.join(self.staging_dir, name)
+            base_file = os.path.join(path, self.BASE_FILE)
+            if not os.path.exists(base_file):
+                continue
+            with open(base_file) as f:
+                base = f.read().strip() or None
+            if base == self.current():
+                return path
+        return None
+
+    def stage(self, resume=False):
+        """
+        Create the staging directory of a new version.
+
+        Parameters:
+        -----------
+        resume : bool, optional
+            Reuse the staging directory of an unpublished run when it was
+            started from the version that is still published.
+
+        Returns:
+        --------
+        str
+            The staging directory, holding a copy of the published results.
+        """
+        if resume:
+            path = self.open_staging()
+            if path is not None:
+                return path
+        if os.path.exists(self.staging_dir):
+            shutil.rmtree(self.staging_dir)
+
+        version = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        path = os.path.join(self.staging_dir, version)
+        os.makedirs(path)
+        source = self.current_dir()
+        for name in os.listdir(source):
+            source_path = os.path.join(source, name)
+            if os.path.isfile(source_path) and name != self.POINTER_FILE and name not in self.RUN_FILES:
+                shutil.copy2(source_path, os.path.join(path, name))
+        with open(os.path.join(path, self.BASE_FILE), 'w') as f:
+            f.write(self.current() or '')
+        return path
+
+    def publish(self, staging_path):
+        """
+        Publish a staged version and prune the old ones.
+
+        Publications must not run concurrently; the build pipeline and the
+        forecasting command publish once per run.
+
+        Parameters:
+        -----------
+        staging_path : str
+            A directory returned by `stage`.
+
+        Returns:
+        --------
+        str
+            The id of the published version.
+        """
+        version = os.path.basename(os.path.normpath(staging_path))
+        for name in self.RUN_FILES:
+            if os.path.exists(os.path.join(staging_path, name)):
+                os.remove(os.path.join(staging_path, name))
+        os.makedirs(self.versions_dir, exist_ok=True)
+        os.rename(staging_path, os.path.join(self.versions_dir, version))
+        self._set_current(version)
+        self.prune()
+        print(f"Published model results version {version}")
+        return version
+
+    def _set_current(self, version):
+        tmp_path = f"{self.pointer_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+        os.replace(tmp_path, self.pointer_path)
+
+    def rollback(self, version=None):
+        """
+        Point readers back to an earlier version.
+
+        Parameters:
+        -----------
+        version : str, optional
+            The version to publish again; the one before the current
+            version by default.
+
+        Returns:
+        --------
+        str
+            The id of the published version.
+        """
+        versions = self.versions()
+        if version is None:
+            current = self.current()
+            older = [v for v in versions if current is None or v < current]
+            if not older:
+                raise ValueError("No earlier version to roll back to")
+            version = older[-1]
+        elif version not in versions:
+            raise ValueError(f"Unknown version '{version}', expected one of {versions}")
+        self._set_current(version)
+        print(f"Rolled back model results to version {version}")
+        return version
+
+    def prune(self):
+        """
+        Remove the published versions beyond the last `keep`, never the
+        current one.
+        """
+        current = self.current()
+        for version in self.versions()[:-self.keep]:
+            if version != current:
+                shutil.rmtree(os.path.join(self.versions_dir, version), ignore_errors=True)
+
+
+# Example usage: python ResultsPublisher.py --list
+#                python ResultsPublisher.py --rollback [version]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the published model results.")
+    parser.add_argument('--list', action='store_true', help="list the published versions")
+    parser.add_argument('--rollback', nargs='?', const='', default=None, metavar='VERSION',
+                        help="publish an earlier version again (default: the previous one)")
+    args = parser.parse_args()
+
+    publisher = ResultsPublisher('model_results')
+    if args.rollback is not None:
+        publisher.rollback(args.rollback or None)
+    current = publisher.current()
+    for version in publisher.versions():
+        print(f"{'*' if version == current else ' '} {version}")
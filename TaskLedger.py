@@ -0,0 +1,102 @@
+import json
+import os
+import threading
+import time
+
+
+class TaskLedger:
+    """
+    Append-only record of the completed tasks of a forecasting run.
+
+    Every (dataset, model, column) task is written as one JSON line as soon
+    as its forecast is saved, with its metrics, its output file and a
+    fingerprint of what it was computed from (the input data, the model
+    parameters and the horizon). A run that crashed can then be resumed:
+    tasks whose fingerprint still matches are skipped.
+
+    Lines are flushed and synced one by one, so at most the task being
+    written is lost; a truncated last line is ignored when reading.
+
+    Attributes:
+    -----------
+    path : str
+        The JSON lines file.
+
+    Methods:
+    --------
+    completed():
+        Return the last entry of every recorded task.
+    record(key, fingerprint, output_file, metrics):
+        Record a completed task.
+    compact():
+        Rewrite the file keeping only the last entry of every task.
+    """
+
+    # Shared by every ledger of the process, as concurrent runs writing to
+    # the same folder use the same file
+    _lock = threading.Lock()
+
+    def __init__(self, path):
+        self.path = path
+
+    def completed(self):
+        """
+        Return the last entry of every recorded task.
+
+        Returns:
+        --------
+        dict
+            Entries keyed by (dataset, model, column).
+        """
+        entries = {}
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Interrupted while writing this line
+                    continue
+                entries[(entry['dataset'], entry['model'], entry['column'])] = entry
+        return entries
+
+    def record(self, key, fingerprint, output_file, metrics):
+        """
+        Record a completed task.
+
+        Parameters:
+        -----------
+        key : tuple
+            (dataset, model, column) of the task.
+        fingerprint : dict
+            What the forecast was computed from.
+        output_file : str
+            Where the forecast was saved.
+        metrics : dict
+            The metrics of the forecast.
+        """
+        dataset, model, column = key
+        entry = {'dataset': dataset, 'model': model, 'column': column,
+                 'fingerprint': fingerprint, 'output': output_file,
+                 'metrics': {name: float(value) for name, value in metrics.items()},
+                 'finished': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        with self._lock:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def compact(self):
+        """
+        Rewrite the file keeping only the last entry of every task.
+        """
+        with self._lock:
+            entries = self.completed()
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                for entry in entries.values():
+                    f.write(json.dumps(entry) + '\n')
+            os.replace(tmp_path, self.path)
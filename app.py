@@ -1,17 +1,49 @@
+import time
+started_at = time.time()
+
+import gc
+
 from DashboardManager import DashboardManager
 from FileHandler import FileHandler
 from PlotManager import PlotManager
+from CallbackCache import CallbackCache, MemoryCacheBackend, SQLiteCacheBackend
+import os
 
 # Initialize the handlers
-file_handler = FileHandler(processed_dir='processed', model_results_dir='model_results')
+# Files held by the data snapshot (python DataSnapshot.py) are memory-mapped
+# instead of parsed
+file_handler = FileHandler(processed_dir='processed', model_results_dir='model_results',
+                           snapshot_dir=os.environ.get('DATA_SNAPSHOT', 'snapshot'))
 plot_manager = PlotManager()
 
+# Callback results are cached per process by default; point CALLBACK_CACHE
+# at a SQLite file to share the entries between gunicorn workers
+cache_path = os.environ.get('CALLBACK_CACHE')
+callback_cache = CallbackCache(
+    SQLiteCacheBackend(cache_path) if cache_path else MemoryCacheBackend(),
+    version=file_handler.results_version)
+
 # Create an instance of the dashboard manager
-dashboard_manager = DashboardManager(file_handler, plot_manager)
+dashboard_manager = DashboardManager(
+    file_handler, plot_manager, callback_cache=callback_cache,
+    warm_cache=os.environ.get('WARM_CALLBACK_CACHE') == '1',
+    client_side=os.environ.get('CLIENT_SIDE_FORECASTS') == '1',
+    payload_decimals=int(os.environ['PAYLOAD_DECIMALS']) if 'PAYLOAD_DECIMALS' in os.environ else None,
+    payload_stats=os.environ.get('PAYLOAD_STATS') == '1',
+    max_points=int(os.environ['PLOT_MAX_POINTS']) if 'PLOT_MAX_POINTS' in os.environ else None,
+    started_at=started_at,
+    # New data and model results are picked up without a restart; set to 0
+    # to disable the checks
+    reload_interval=float(os.environ.get('RELOAD_INTERVAL', '30')))
 
 # Expose the server for deployment platforms
 server = dashboard_manager.server
 
+# With gunicorn --preload the app is loaded once and the workers are forked
+# from it. Freezing the objects built so far keeps the garbage collector of
+# each worker from writing to, and so copying, the pages they live on.
+gc.freeze()
+
 if __name__ == "__main__":
     # Run the Dash app locally
     dashboard_manager.run(port=8050)
\ No newline at end of file
@@ -11,8 +11,12 @@ class ARIMAModel(BaseForecastModel):
         Fit the ARIMA model to the data.
     predict(X):
         Predict future values using the ARIMA model.
+    update(X, y):
+        Append new observations to the fitted ARIMA model.
     """
 
+    supports_update = True
+
     def __init__(self, order=(5, 1, 0)):  # ARIMA(p,d,q)
         self.order = order
         self.model = None
@@ -21,6 +25,13 @@ class ARIMAModel(BaseForecastModel):
         self.model = ARIMA(y, order=self.order).fit()
         return self.model
 
+    def update(self, X, y):
+        # The state-space results are extended at the fitted parameters
+        new_y = y[self.model.nobs:]  # type: ignore
+        if len(new_y):
+            self.model = self.model.append(new_y)  # type: ignore
+        return self.model
+
     def predict(self, X):
         steps = len(X)
         forecast = self.model.forecast(steps=steps) # type: ignore
@@ -1,3 +1,6 @@
+import hashlib
+import inspect
+import sys
 from abc import ABC, abstractmethod
 
 class BaseForecastModel(ABC):
@@ -10,12 +13,119 @@ class BaseForecastModel(ABC):
         Fit the model to the data.
     predict(X):
         Predict future values.
+    update(X, y):
+        Extend a fitted model with new observations at fixed parameters.
+    forecast_panel(X, Y, future_X):
+        Forecast many series sharing the same dates at once.
+    get_params():
+        Return the hyperparameters the model was built with.
+    code_version():
+        Return a token of the code fitting the model.
     """
 
+    # Whether `update` can extend a fit instead of re-optimizing it
+    supports_update = False
+    # Whether `forecast_panel` can forecast many series in one call
+    supports_panel = False
+    # The input the model is fitted on: 'ordinal' dates as an (n, 1) array,
+    # the 'dates' frame holding 'Start Date', or a 'prophet' ds/y frame
+    data_format = 'ordinal'
+    # Whether the future predictions get a small random perturbation
+    jitter = True
+    # Where the in-sample predictions come from: the 'fittedvalues' of the
+    # fit or a call to 'predict' on the history
+    in_sample = 'fittedvalues'
+    # Bumped to invalidate cached fits and saved states when the fitting
+    # changes outside the model's own sources, e.g. in a backend library
+    cache_version = 1
+
     @abstractmethod
     def fit(self, X, y):
         pass
 
     @abstractmethod
     def predict(self, X):
-        pass
\ No newline at end of file
+        pass
+
+    def update(self, X, y):
+        """
+        Extend the fitted model with the observations appended to `y`.
+
+        `X` and `y` hold the whole history; the rows beyond the ones the
+        model was fitted on are the new observations.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support incremental updates")
+
+    def forecast_panel(self, X, Y, future_X, level=0.95, name=None):
+        """
+        Forecast many series sharing the same dates at once.
+
+        The model itself is left unchanged, so its parameters and cache
+        keys stay those of the single-series fits.
+
+        Parameters:
+        -----------
+        X : np.ndarray
+            The (n, 1) ordinal dates of the history.
+        Y : np.ndarray
+            The (n, k) history, one series per column.
+        future_X : np.ndarray
+            The (h, 1) ordinal dates to forecast.
+        level : float, optional
+            Coverage of the prediction intervals, default is 0.95.
+        name : str, optional
+            Identifies the panel when a run forecasts several, for models
+            that save state per panel.
+
+        Returns:
+        --------
+        dict
+            (n, k) 'fitted' values and (h, k) 'forecast', 'lower' and
+            'upper' arrays.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support panel forecasts")
+
+    def get_params(self):
+        """
+        Return the hyperparameters the model was built with.
+
+        Every attribute except the wrapped estimator (`model`) and fitted
+        state kept in underscore attributes is treated as a hyperparameter.
+        """
+        return {key: value for key, value in vars(self).items()
+                if key != 'model' and not key.startswith('_')}
+
+    @classmethod
+    def code_version(cls):
+        """
+        Return a token of the code fitting the model.
+
+        It hashes `cache_version` and the source files of the class, of its
+        base classes and of the project classes their modules use (e.g.
+        BatchHoltWinters for HoltWintersModel), so cached fits and saved
+        states are not reused once that code changes.
+        """
+        if '_code_version' not in cls.__dict__:
+            modules = {}
+            for klass in cls.__mro__:
+                module = sys.modules.get(klass.__module__)
+                if module is None or klass.__module__ == 'builtins' or klass is ABC:
+                    continue
+                modules[module.__name__] = module
+                package = module.__name__.rpartition('.')[0]
+                for value in vars(module).values():
+                    used = sys.modules.get(getattr(value, '__module__', None) or '')
+                    if inspect.isclass(value) and used is not None and package and \
+                            used.__name__.startswith(package + '.'):
+                        modules[used.__name__] = used
+            digest = hashlib.sha256(str(cls.cache_version).encode())
+            for name in sorted(modules):
+                try:
+                    with open(inspect.getsourcefile(modules[name]), 'rb') as f:  # type: ignore
+                        digest.update(f.read())
+                except (TypeError, OSError):
+                    digest.update(name.encode())
+            cls._code_version = digest.hexdigest()[:16]
+        return cls._code_version  # type: ignore
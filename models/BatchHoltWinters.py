@@ -0,0 +1,356 @@
+from statistics import NormalDist
+import numpy as np
+
+# Smallest smoothing level, as in statsmodels
+LOWER_BOUND = np.sqrt(np.finfo(float).eps)
+
+
+class BatchHoltWinters:
+    """
+    Holt-Winters exponential smoothing of many series at once.
+
+    The series are the columns of an (n, k) array and share their length.
+    The smoothing recursions run over time with every series in the same
+    vectorized array operation, so a step costs the same few NumPy calls
+    whether there are 2 or 200 series.
+
+    The model follows statsmodels' `ExponentialSmoothing` with an additive
+    or no trend, an additive, multiplicative or no seasonality and the
+    'legacy-heuristic' initialization. Every series gets its own smoothing
+    parameters, minimizing its sum of squared errors, and the optimizer
+    steps every series at once, evaluating their finite differences in
+    one batched pass. As in statsmodels, the trend smoothing is bounded by
+    the level smoothing and the seasonal smoothing by its complement.
+
+    Attributes:
+    -----------
+    seasonal_periods : int
+        Number of periods in a season.
+    trend : str or None
+        'add' or None.
+    seasonal : str or None
+        'add', 'mul' or None.
+    params : dict
+        The smoothing parameters and initial states of every series, once
+        fitted.
+    fittedvalues : np.ndarray
+        The one-step-ahead in-sample predictions, once fitted.
+
+    Methods:
+    --------
+    fit(Y):
+        Optimize the smoothing parameters of every series.
+    update(Y):
+        Rerun the recursions over a longer history at the fitted parameters.
+    forecast(steps):
+        Forecast every series.
+    prediction_interval(steps, level):
+        Bounds of the forecasts from the in-sample residuals.
+    """
+
+    def __init__(self, seasonal_periods=12, trend='add', seasonal='add'):
+        if trend not in ('add', None):
+            raise ValueError(f"Unsupported trend '{trend}', expected 'add' or None")
+        if seasonal not in ('add', 'mul', None):
+            raise ValueError(f"Unsupported seasonal '{seasonal}', expected 'add', 'mul' or None")
+        self.seasonal_periods = seasonal_periods
+        self.trend = trend
+        self.seasonal = seasonal
+        self.params = None
+        self.fittedvalues = None
+        self._states = None
+        self._squeeze = False
+
+    @property
+    def _m(self):
+        return self.seasonal_periods if self.seasonal is not None else 0
+
+    def initial_values(self, Y):
+        """
+        Initial level, trend and seasons of every series, computed as
+        statsmodels' 'legacy-heuristic' initialization does.
+        """
+        n, k = Y.shape
+        m = self._m
+        if m:
+            level = Y[np.arange(n) % m == 0].mean(axis=0)
+            trend = ((Y[m:2 * m] - Y[:m]) / m).mean(axis=0)
+            seasons = Y[:m] / level if self.seasonal == 'mul' else Y[:m] - level
+        else:
+            level = Y[0].copy()
+            trend = Y[1] - Y[0]
+            seasons = np.zeros((0, k))
+        if self.trend is None:
+            trend = np.zeros(k)
+        return level, trend, seasons
+
+    def _restrict(self, u):
+        """
+        Map values in [0, 1] onto admissible smoothing parameters.
+        """
+        alpha = LOWER_BOUND + u[0] * (1 - 2 * LOWER_BOUND)
+        beta = u[1] * alpha if self.trend is not None else np.zeros_like(alpha)
+        gamma = u[2] * (1 - alpha) if self.seasonal is not None else np.zeros_like(alpha)
+        return alpha, beta, gamma
+
+    def _smooth(self, Y, alpha, beta, gamma, level, trend, seasons, keep_fitted=False):
+        """
+        Run the recursions over the (n, k) history.
+
+        The parameters may carry leading axes, e.g. several parameter sets
+        per series, which are broadcast against the series instead of
+        copying them. Only the last season is kept, so memory does not grow
+        with the length of the history.
+
+        Returns the sum of squared errors, the one-step-ahead predictions
+        when `keep_fitted` is set, and the final states: the level and
+        trend after the last observation and the seasons to forecast with.
+        """
+        n, k = Y.shape
+        m = self._m
+        multiplicative = self.seasonal == 'mul'
+        shape = np.broadcast_shapes(np.shape(alpha), (k,))
+        level = np.broadcast_to(level, shape).copy()
+        trend = np.broadcast_to(trend, shape).copy()
+        # season[t % m] holds the season of period t until it is updated
+        seasons = np.asarray(seasons).reshape((m,) + (1,) * (len(shape) - 1) + (k,))
+        season = np.broadcast_to(seasons, (m,) + shape).copy()
+        sse = np.zeros(shape)
+        fitted = np.empty((n,) + shape) if keep_fitted else None
+        last_season = None
+
+        for t in range(n):
+            y = Y[t]
+            base = level + trend
+            if m:
+                current = season[t % m]
+                prediction = base * current if multiplicative else base + current
+                new_level = base + alpha * ((y / current if multiplicative else y - current) - base)
+                if t == n - 1:
+                    last_season = current.copy()
+                current += gamma * ((y / base if multiplicative else y - base) - current)
+            else:
+                prediction = base
+                new_level = base + alpha * (y - base)
+            if keep_fitted:
+                fitted[t] = prediction  # type: ignore
+            error = y - prediction
+            sse += error * error
+            trend = trend + beta * (new_level - level - trend)
+            level = new_level
+
+        if m:
+            # Like statsmodels, the forecasts reuse the season of the last
+            # observation rather than its update
+            seasons = np.concatenate([season[(n + np.arange(m - 1)) % m], last_season[None]])  # type: ignore
+        else:
+            seasons = season
+        return sse, fitted, (level, trend, seasons)
+
+    def _sse(self, u, Y, initial, scale):
+        """
+        Scaled sum of squared errors of every series for the (3, ..., k)
+        transformed parameters `u`.
+        """
+        sse, _, _ = self._smooth(Y, *self._restrict(u), *initial)
+        return sse / scale ** 2
+
+    def _derivatives(self, u, free, Y, initial, scale, step=1e-4):
+        """
+        Value, gradient and Hessian of the SSE of every parameter set by
+        central differences, all evaluated in one pass over the stencil.
+        """
+        p = len(free)
+        # Derivatives are taken a step away from the bounds
+        u = u.copy()
+        u[free] = np.clip(u[free], step, 1 - step)
+        unit = np.eye(p)
+        offsets = [np.zeros(p)]
+        for i in range(p):
+            offsets += [step * unit[i], -step * unit[i]]
+        pairs = [(i, j) for i in range(p) for j in range(i + 1, p)]
+        for i, j in pairs:
+            for si, sj in ((1, 1), (1, -1), (-1, 1), (-1, -1)):
+                offsets.append(step * (si * unit[i] + sj * unit[j]))
+
+        shift = np.zeros((3, len(offsets)))
+        shift[free] = np.array(offsets).T
+        stencil = u[:, None] + shift.reshape(shift.shape + (1,) * (u.ndim - 1))
+        f = self._sse(stencil, Y, initial, scale)  # (stencil points, ..., k)
+
+        value = f[0]
+        gradient = np.empty(value.shape + (p,))
+        hessian = np.empty(value.shape + (p, p))
+        for i in range(p):
+            plus, minus = f[1 + 2 * i], f[2 + 2 * i]
+            gradient[..., i] = (plus - minus) / (2 * step)
+            hessian[..., i, i] = (plus - 2 * value + minus) / step ** 2
+        for n_pair, (i, j) in enumerate(pairs):
+            pp, pm, mp, mm = f[1 + 2 * p + 4 * n_pair:5 + 2 * p + 4 * n_pair]
+            hessian[..., i, j] = hessian[..., j, i] = (pp - pm - mp + mm) / (4 * step ** 2)
+        return value, gradient, hessian
+
+    def _optimize(self, u, free, Y, initial, scale, maxiter, tol):
+        """
+        Refine the (3, starts, k) starting points by damped Newton steps
+        (Levenberg-Marquardt) kept inside the bounds. Series stop taking
+        part once all their starts have converged.
+        """
+        k = Y.shape[1]
+        damping = np.full(u.shape[1:], 1e-3)
+        converged = np.zeros(k, dtype=bool)
+        identity = np.eye(len(free))
+        for _ in range(maxiter):
+            active = np.flatnonzero(~converged)
+            if not len(active):
+                break
+            ua = u[:, :, active]
+            Ya, scale_a = Y[:, active], scale[active]
+            initial_a = (initial[0][active], initial[1][active], initial[2][:, active])
+
+            value, gradient, hessian = self._derivatives(ua, free, Ya, initial_a, scale_a)
+            # Parameters held at a bound by their gradient are left out of
+            # the step, the others take the Newton step of the rest
+            uf = np.moveaxis(ua[free], 0, -1)
+            bounded = ((uf <= 0) & (gradient > 0)) | ((uf >= 1) & (gradient < 0))
+            gradient[bounded] = 0
+            hessian[bounded[..., :, None] | bounded[..., None, :]] = 0
+            hessian[..., np.arange(len(free)), np.arange(len(free))] += bounded
+            # Shift indefinite Hessians and damp every step
+            lowest = np.linalg.eigvalsh(hessian)[..., 0]
+            shift = (np.maximum(0, -lowest)
+                     + damping[:, active] * np.maximum(np.abs(lowest), 1.0))
+            delta = np.linalg.solve(hessian + shift[..., None, None] * identity,
+                                    -gradient[..., None])[..., 0]
+            trial = ua.copy()
+            trial[free] = np.clip(ua[free] + np.moveaxis(delta, -1, 0), 0, 1)
+            current, trial_value = self._sse(np.stack([ua, trial], axis=1), Ya, initial_a, scale_a)
+
+            better = trial_value < current
+            u[:, :, active] = np.where(better, trial, ua)
+            damping[:, active] = np.where(better, damping[:, active] / 3, damping[:, active] * 4)
+            # A start is done once a step barely improves it, or when no
+            # step, however damped, does
+            improvement = (current - trial_value) / np.maximum(current, 1e-300)
+            done = (better & (improvement < tol)) | (damping[:, active] > 1e8)
+            converged[active] = done.all(axis=0)
+        return u
+
+    def fit(self, Y, grid_points=7, starts=3, maxiter=50, tol=1e-8):
+        """
+        Optimize the smoothing parameters of every series.
+
+        The parameters of each series are optimized jointly, all series
+        moving together, from the best points of a coarse grid, as the
+        brute-force start of statsmodels does. The error surface can have
+        several minima, so each series is refined from the best grid points
+        of `starts` different level smoothings and keeps the best result.
+
+        Parameters:
+        -----------
+        Y : np.ndarray
+            The (n,) history of one series or (n, k) of k series.
+        grid_points : int, optional
+            Grid values per smoothing parameter, default is 7.
+        starts : int, optional
+            Starting points refined per series, default is 3.
+        maxiter : int, optional
+            Maximum number of Newton steps, default is 50.
+        tol : float, optional
+            Relative SSE improvement below which a start is considered
+            converged, default is 1e-8.
+
+        Returns:
+        --------
+        BatchHoltWinters
+            The fitted model.
+        """
+        Y = np.asarray(Y, dtype=np.float64)
+        self._squeeze = Y.ndim == 1
+        Y = Y.reshape(len(Y), -1)
+        k = Y.shape[1]
+        initial = self.initial_values(Y)
+        # Scaling keeps the finite differences comparable between series
+        scale = np.maximum(Y.std(axis=0), 1e-12)
+        free = np.flatnonzero([True, self.trend is not None, self.seasonal is not None])
+
+        # Every series evaluated at every grid point in one pass
+        axes = [np.linspace(0.05, 0.95, grid_points) if i in free else np.zeros(1) for i in range(3)]
+        grid = np.stack(np.meshgrid(*axes, indexing='ij')).reshape(3, -1)  # (3, G)
+        sse = self._sse(grid[:, :, None], Y, initial, scale)  # (G, k)
+
+        # The starts are the best grid points of different level smoothings,
+        # which tend to lie in different basins
+        per_level = sse.reshape(grid_points, -1, k)
+        candidates = per_level.argmin(axis=1) + np.arange(grid_points)[:, None] * per_level.shape[1]
+        starts = min(starts, grid_points)
+        order = np.argsort(np.take_along_axis(sse, candidates, axis=0), axis=0)[:starts]
+        best = np.take_along_axis(candidates, order, axis=0)  # (starts, k)
+
+        u = self._optimize(grid[:, best], free, Y, initial, scale, maxiter, tol)
+        value = self._sse(u, Y, initial, scale)  # (starts, k)
+        u = u[:, value.argmin(axis=0), np.arange(k)]
+
+        alpha, beta, gamma = self._restrict(u)
+        level, trend, seasons = initial
+        self.params = {'smoothing_level': alpha, 'smoothing_trend': beta,
+                       'smoothing_seasonal': gamma, 'initial_level': level,
+                       'initial_trend': trend, 'initial_seasons': seasons}
+        return self.update(Y)
+
+    def update(self, Y):
+        """
+        Rerun the recursions over `Y` at the fitted parameters and initial
+        states, e.g. once new observations are appended.
+        """
+        Y = np.asarray(Y, dtype=np.float64)
+        Y = Y.reshape(len(Y), -1)
+        p = self.params
+        _, fitted, self._states = self._smooth(
+            Y, p['smoothing_level'], p['smoothing_trend'], p['smoothing_seasonal'],  # type: ignore
+            p['initial_level'], p['initial_trend'], p['initial_seasons'], keep_fitted=True)  # type: ignore
+        self.fittedvalues = fitted[:, 0] if self._squeeze else fitted  # type: ignore
+        self._residuals = Y - fitted  # type: ignore
+        return self
+
+    def forecast(self, steps):
+        """
+        Forecast every series `steps` periods ahead.
+
+        Returns an array shaped like the history: (steps,) or (steps, k).
+        """
+        level, trend, seasons = self._states  # type: ignore
+        horizon = np.arange(1, steps + 1)[:, None]
+        forecast = level + horizon * trend
+        m = self._m
+        if m:
+            season = seasons[(horizon[:, 0] - 1) % m]
+            forecast = forecast * season if self.seasonal == 'mul' else forecast + season
+        return forecast[:, 0] if self._squeeze else forecast
+
+    def prediction_interval(self, steps, level=0.95):
+        """
+        Lower and upper bounds of the forecasts.
+
+        The variance of the h-step error follows the additive
+        error-correction form of the model, sigma^2 (1 + sum of c_j^2) with
+        c_j = alpha (1 + beta j) + gamma [j a multiple of m], and sigma the
+        residual standard error; for multiplicative seasonality it is an
+        approximation.
+        """
+        p = self.params
+        alpha, beta, gamma = p['smoothing_level'], p['smoothing_trend'], p['smoothing_seasonal']  # type: ignore
+        dof = max(len(self._residuals) - 1, 1)
+        sigma = np.sqrt((self._residuals ** 2).sum(axis=0) / dof)
+        j = np.arange(1, steps)[:, None]
+        c = alpha * (1 + beta * j)
+        if self._m:
+            c = c + gamma * (j % self._m == 0)
+        variance = np.concatenate([np.ones((1, len(sigma))), 1 + np.cumsum(c ** 2, axis=0)])
+        half_width = NormalDist().inv_cdf(0.5 + level / 2) * sigma * np.sqrt(variance)
+
+        forecast = self.forecast(steps).reshape(steps, -1)
+        lower, upper = forecast - half_width, forecast + half_width
+        if self._squeeze:
+            return lower[:, 0], upper[:, 0]
+        return lower, upper
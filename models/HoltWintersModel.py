@@ -1,30 +1,87 @@
 from statsmodels.tsa.holtwinters import ExponentialSmoothing
 from models.BaseForecastModel import BaseForecastModel
+from models.BatchHoltWinters import BatchHoltWinters
 
 class HoltWintersModel(BaseForecastModel):
     """
     Holt-Winters (Triple Exponential Smoothing) model for time series forecasting.
 
+    The 'statsmodels' backend, the default, fits `ExponentialSmoothing`
+    series by series, estimating the initial level, trend and seasons
+    together with the smoothing parameters.
+
+    The 'numpy' backend is an approximation: BatchHoltWinters forecasts a
+    whole panel of series in one vectorized fit (see `forecast_panel`), but
+    only optimizes the smoothing parameters, from the 'legacy-heuristic'
+    initial states, so its fits have a higher sum of squared errors.
+
     Methods:
     --------
     fit(X, y):
         Fit the Holt-Winters model to the data.
     predict(X):
         Predict future values using the Holt-Winters model.
+    update(X, y):
+        Rerun the smoothing over new observations at the fitted parameters.
+    forecast_panel(X, Y, future_X):
+        Forecast many series at once with the 'numpy' backend.
     """
 
-    def __init__(self, seasonal_periods=12, trend='add', seasonal='add'):
+    supports_update = True
+
+    def __init__(self, seasonal_periods=12, trend='add', seasonal='add', backend='statsmodels'):
+        if backend not in ('statsmodels', 'numpy'):
+            raise ValueError(f"Unknown backend '{backend}', expected 'statsmodels' or 'numpy'")
         self.seasonal_periods = seasonal_periods
         self.trend = trend
         self.seasonal = seasonal
+        self.backend = backend
         self.model = None
 
+    @property
+    def supports_panel(self):
+        return self.backend == 'numpy'
+
     def fit(self, X, y):
+        if self.backend == 'numpy':
+            self.model = BatchHoltWinters(self.seasonal_periods, self.trend, self.seasonal).fit(y)
+            return self.model
         self.model = ExponentialSmoothing(y, seasonal_periods=self.seasonal_periods,
                                           trend=self.trend, seasonal=self.seasonal).fit()
         return self.model
 
+    def update(self, X, y):
+        if self.backend == 'numpy':
+            self.model.update(y)  # type: ignore
+            return self.model
+        # Rerun the recursions from the fitted initial states and smoothing
+        # parameters; only the optimizer is skipped, which is the costly part
+        params = self.model.params  # type: ignore
+        initial = {'initial_level': params['initial_level']}
+        smoothing = {'smoothing_level': params['smoothing_level']}
+        if self.trend is not None:
+            initial['initial_trend'] = params['initial_trend']
+            smoothing['smoothing_trend'] = params['smoothing_trend']
+        if self.seasonal is not None:
+            initial['initial_seasonal'] = params['initial_seasons']
+            smoothing['smoothing_seasonal'] = params['smoothing_seasonal']
+
+        self.model = ExponentialSmoothing(
+            y, seasonal_periods=self.seasonal_periods, trend=self.trend,
+            seasonal=self.seasonal, initialization_method='known',
+            **initial).fit(optimized=False, **smoothing)
+        return self.model
+
     def predict(self, X):
         steps = len(X)
         forecast = self.model.forecast(steps=steps) # type: ignore
         return forecast
+
+    def forecast_panel(self, X, Y, future_X, level=0.95, name=None):
+        if self.backend != 'numpy':
+            return super().forecast_panel(X, Y, future_X, level, name)
+        model = BatchHoltWinters(self.seasonal_periods, self.trend, self.seasonal).fit(Y)
+        steps = len(future_X)
+        lower, upper = model.prediction_interval(steps, level)
+        return {'fitted': model.fittedvalues, 'forecast': model.forecast(steps),
+                'lower': lower, 'upper': upper}
@@ -1,26 +1,88 @@
+import os
+import pickle
+from datetime import date
+from statistics import NormalDist
 from models.BaseForecastModel import BaseForecastModel
 from darts.models import RNNModel
 from darts import TimeSeries
+from darts.dataprocessing.transformers import Scaler
+from pytorch_lightning.callbacks import EarlyStopping
+import numpy as np
 import pandas as pd
+import torch
 
 class LSTMModel(BaseForecastModel):
     """
     LSTM model for time series forecasting using Darts.
 
+    In global mode a single network is trained on every series of the run
+    at once, each min-max scaled on its own, and all the series are
+    forecast by one batched `predict` (see `forecast_panel`), instead of
+    one training run per series. The trained network and its scalers can
+    be saved to `checkpoint_path` and loaded back with `load`; a run with
+    several panels saves each to its own file (see `checkpoint_file`).
+
+    Training is bounded by a budget: the last `validation_periods` of every
+    series are held out to stop early once the validation loss stops
+    improving for `patience` epochs, `max_time` caps the wall-clock
+    seconds of a fit and `n_threads` the torch intra-op threads. With
+    `warm_start`, a global network already saved at `checkpoint_path`, e.g.
+    by the previous release, is trained further for `warm_start_epochs`
+    instead of from scratch.
+
     Methods:
     --------
     fit(X, y):
         Fit the LSTM model to the data.
     predict(X):
         Predict future values using the LSTM model.
+    fit_panel(X, Y):
+        Train the global network on many series.
+    predict_panel(Y, steps):
+        Forecast many series with the global network.
+    forecast_panel(X, Y, future_X, name):
+        Train on and forecast many series at once in global mode.
+    checkpoint_file(name):
+        The checkpoint of a panel.
+    save(path):
+        Save the trained network and its scalers.
+    load(path):
+        Load a model saved with `save`.
     """
 
-    def __init__(self, input_chunk_length=12, output_chunk_length=6, n_epochs=50):
+    data_format = 'dates'
+
+    def __init__(self, input_chunk_length=12, output_chunk_length=6, n_epochs=50,
+                 global_model=False, checkpoint_path=None, batch_size=32,
+                 validation_periods=0, patience=5, max_time=None, n_threads=None,
+                 warm_start=False, warm_start_epochs=5):
+        self.input_chunk_length = input_chunk_length
+        self.output_chunk_length = output_chunk_length
+        self.n_epochs = n_epochs
+        self.global_model = global_model
+        self.checkpoint_path = checkpoint_path
+        self.batch_size = batch_size
+        self.validation_periods = validation_periods
+        self.patience = patience
+        self.max_time = max_time
+        self.n_threads = n_threads
+        self.warm_start = warm_start
+        self.warm_start_epochs = warm_start_epochs
+        # Scalers of the series the global network was trained on
+        self._scaler = None
+        self._times = None
+
+        # The early stopping callback is added by each fit (see `_train`)
+        trainer_kwargs = {'accelerator': 'cpu', 'enable_progress_bar': False}
+        if max_time:
+            trainer_kwargs['max_time'] = {'seconds': max_time}
         self.model = RNNModel(
             model="LSTM",
             input_chunk_length=input_chunk_length,
             output_chunk_length=output_chunk_length,
-            n_epochs=n_epochs
+            n_epochs=n_epochs,
+            batch_size=batch_size,
+            pl_trainer_kwargs=trainer_kwargs
         )
 
     def fit(self, X, y):
@@ -40,9 +102,189 @@ class LSTMModel(BaseForecastModel):
         series = TimeSeries.from_dataframe(X, 'Start Date', y.columns[0])
         
         # Fit the model on the time series
-        self.model.fit(series)
+        self._train([series])
         
         
     def predict(self, X):
         forecast = self.model.predict(n=len(X))
         return forecast.values() # type: ignore
+
+    @property
+    def supports_panel(self):
+        return self.global_model
+
+    @staticmethod
+    def _to_times(X):
+        """
+        Convert the (n, 1) ordinal dates of the panel hook to a date index.
+        """
+        return pd.DatetimeIndex([date.fromordinal(int(ordinal)) for ordinal in np.ravel(X)])
+
+    def _to_series(self, Y):
+        Y = np.asarray(Y, dtype=np.float32).reshape(len(Y), -1)
+        times = self._times
+        if len(Y) != len(times):  # type: ignore
+            # History extended since training, at the same frequency
+            times = pd.date_range(times[0], periods=len(Y), freq=pd.infer_freq(times))  # type: ignore
+        return [TimeSeries.from_times_and_values(times, Y[:, j]) for j in range(Y.shape[1])]
+
+    def _split(self, series):
+        """
+        Hold out the last `validation_periods` of every series; the
+        validation series keep the input window preceding them.
+        """
+        if not self.validation_periods:
+            return series, None
+        context = max(self.input_chunk_length, getattr(self.model, 'training_length', 0))
+        train = [s[:-self.validation_periods] for s in series]
+        val = [s[-(self.validation_periods + context):] for s in series]
+        return train, val
+
+    def _warm_start(self, path):
+        """
+        Load the weights saved at `path`, returning the number of epochs to
+        train them for, or None to train from scratch.
+        """
+        if not (self.warm_start and path and os.path.exists(path)):
+            return None
+        try:
+            self.model.load_weights(path)
+        except Exception as e:
+            # Saved by a network of another shape
+            print(f"Training the LSTM from scratch, cannot reuse {path}: {e}")
+            return None
+        print(f"Warm-starting the LSTM from {path}")
+        return self.warm_start_epochs
+
+    def _callbacks(self):
+        """
+        Return new callbacks for a training run. EarlyStopping keeps the
+        best loss and the epochs waited since, so a callback reused by the
+        next fit would stop it from the state of the previous one.
+        """
+        callbacks = [callback for callback in self.model.trainer_params.get('callbacks', [])
+                     if not isinstance(callback, EarlyStopping)]
+        if self.validation_periods:
+            callbacks.append(EarlyStopping(monitor='val_loss', patience=self.patience))
+        return callbacks
+
+    def _train(self, series, checkpoint_path=None):
+        """
+        Train the network on a list of series within the training budget,
+        from the weights saved at `checkpoint_path` when there are some.
+        """
+        if self.n_threads:
+            torch.set_num_threads(self.n_threads)
+        self.model.trainer_params['callbacks'] = self._callbacks()
+        train, val = self._split(series)
+        epochs = self._warm_start(checkpoint_path) or 0
+        self.model.fit(train, val_series=val, epochs=epochs)
+
+    def checkpoint_file(self, name=None):
+        """
+        Return the checkpoint of a panel: `checkpoint_path` itself, or for
+        a named panel the same path with the name appended to its stem.
+        """
+        if not self.checkpoint_path or name is None:
+            return self.checkpoint_path
+        root, extension = os.path.splitext(self.checkpoint_path)
+        return f"{root}_{name}{extension}"
+
+    def fit_panel(self, X, Y, checkpoint_path=None):
+        """
+        Train the global network on every column of `Y`.
+
+        Parameters:
+        -----------
+        X : np.ndarray
+            The (n, 1) ordinal dates shared by the series.
+        Y : np.ndarray
+            The (n, k) history, one series per column.
+        checkpoint_path : str, optional
+            A network saved by an earlier run to warm-start from.
+        """
+        self._times = self._to_times(X)
+        self._scaler = Scaler()
+        self._train(self._scaler.fit_transform(self._to_series(Y)), checkpoint_path)
+        return self.model
+
+    def predict_panel(self, Y, steps):
+        """
+        Forecast every column of `Y` with one batched call of the network.
+
+        Parameters:
+        -----------
+        Y : np.ndarray
+            The (n, k) history of the series the network was trained on,
+            possibly extended with new observations.
+        steps : int
+            The number of periods to forecast.
+
+        Returns:
+        --------
+        np.ndarray
+            The (steps, k) forecasts.
+        """
+        forecasts = self.model.predict(n=steps, series=self._scaler.transform(self._to_series(Y)))  # type: ignore
+        forecasts = self._scaler.inverse_transform(forecasts)  # type: ignore
+        return np.column_stack([forecast.values()[:, 0] for forecast in forecasts])
+
+    def forecast_panel(self, X, Y, future_X, level=0.95, name=None):
+        """
+        Train the global network on every series and forecast them all.
+
+        The in-sample values are the one-step-ahead historical forecasts of
+        the trained network, missing for the first `input_chunk_length`
+        periods, and the intervals widen with the square root of the
+        horizon from their residual standard error. When `checkpoint_path`
+        is set, the network starts from and is saved to the checkpoint of
+        the panel (see `checkpoint_file`).
+
+        See BaseForecastModel.forecast_panel for the parameters.
+        """
+        if not self.global_model:
+            return super().forecast_panel(X, Y, future_X, level, name)
+        Y = np.asarray(Y, dtype=np.float64).reshape(len(Y), -1)
+        checkpoint_path = self.checkpoint_file(name)
+        self.fit_panel(X, Y, checkpoint_path)
+        forecast = self.predict_panel(Y, len(future_X))
+
+        scaled = self._scaler.transform(self._to_series(Y))  # type: ignore
+        history = self._scaler.inverse_transform(self.model.historical_forecasts(  # type: ignore
+            scaled, forecast_horizon=1, retrain=False, last_points_only=True, verbose=False))
+        fitted = np.full(Y.shape, np.nan)
+        for j, series in enumerate(history):
+            values = series.values()[:, 0]
+            fitted[len(Y) - len(values):, j] = values
+
+        sigma = np.nanstd(Y - fitted, axis=0)
+        horizon = np.arange(1, len(future_X) + 1)[:, None]
+        half_width = NormalDist().inv_cdf(0.5 + level / 2) * sigma * np.sqrt(horizon)
+        if checkpoint_path:
+            self.save(checkpoint_path)
+        return {'fitted': fitted, 'forecast': forecast,
+                'lower': forecast - half_width, 'upper': forecast + half_width}
+
+    def save(self, path):
+        """
+        Save the trained network, its scalers and the dates it was trained
+        on; Darts writes the network to `path` and its weights next to it.
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.model.save(path)
+        with open(f"{path}.scaler.pkl", 'wb') as f:
+            pickle.dump({'params': self.get_params(), 'scaler': self._scaler, 'times': self._times}, f)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a model saved with `save`, ready for `predict_panel`.
+        """
+        with open(f"{path}.scaler.pkl", 'rb') as f:
+            state = pickle.load(f)
+        model = cls(**state['params'])
+        model.model = RNNModel.load(path)
+        model._scaler = state['scaler']
+        model._times = state['times']
+        return model
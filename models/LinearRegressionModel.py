@@ -1,3 +1,5 @@
+from statistics import NormalDist
+import numpy as np
 from sklearn.linear_model import LinearRegression
 from models.BaseForecastModel import BaseForecastModel
 
@@ -11,8 +13,15 @@ class LinearRegressionModel(BaseForecastModel):
         Fit the linear regression model to the data.
     predict(X):
         Predict future values using the linear regression model.
+    forecast_panel(X, Y, future_X):
+        Fit and forecast the trend of many series with one least-squares
+        solve.
     """
 
+    jitter = False
+    in_sample = 'predict'
+    supports_panel = True
+
     def __init__(self):
         self.model = LinearRegression()
 
@@ -21,3 +30,36 @@ class LinearRegressionModel(BaseForecastModel):
 
     def predict(self, X):
         return self.model.predict(X)
+
+    def forecast_panel(self, X, Y, future_X, level=0.95, name=None):
+        """
+        Fit and forecast the linear trend of every column of `Y`.
+
+        All the series share the design matrix [1, date], so the trends
+        come from a single least-squares solve and a new series only adds a
+        column to `Y`. The dates are centred to keep the solve well
+        conditioned. The prediction intervals use the residual standard
+        error of each series and the leverage of the future dates, which is
+        the same for every series.
+
+        See BaseForecastModel.forecast_panel for the parameters.
+        """
+        x = np.asarray(X, dtype=np.float64).ravel()
+        future_x = np.asarray(future_X, dtype=np.float64).ravel()
+        Y = np.asarray(Y, dtype=np.float64)
+        centre = x.mean()
+        design = np.column_stack([np.ones_like(x), x - centre])
+        future_design = np.column_stack([np.ones_like(future_x), future_x - centre])
+
+        coefficients = np.linalg.lstsq(design, Y, rcond=None)[0]  # (2, k)
+        fitted = design @ coefficients
+        forecast = future_design @ coefficients
+
+        dof = max(len(x) - design.shape[1], 1)
+        sigma = np.sqrt(((Y - fitted) ** 2).sum(axis=0) / dof)  # (k,)
+        leverage = np.einsum('ij,jk,ik->i', future_design,
+                             np.linalg.pinv(design.T @ design), future_design)  # (h,)
+        half_width = (NormalDist().inv_cdf(0.5 + level / 2)
+                      * np.sqrt(1 + leverage)[:, None] * sigma[None, :])
+        return {'fitted': fitted, 'forecast': forecast,
+                'lower': forecast - half_width, 'upper': forecast + half_width}
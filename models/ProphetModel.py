@@ -13,6 +13,8 @@ class ProphetModel(BaseForecastModel):
         Predict future values using the Prophet model.
     """
 
+    data_format = 'prophet'
+
     def __init__(self):
         self.model = Prophet()
 
@@ -11,8 +11,12 @@ class SARIMAModel(BaseForecastModel):
         Fit the SARIMA model to the data.
     predict(X):
         Predict future values using the SARIMA model.
+    update(X, y):
+        Append new observations to the fitted SARIMA model.
     """
 
+    supports_update = True
+
     def __init__(self, order=(1, 1, 1), seasonal_order=(1, 1, 1, 12)):  # ARIMA(p,d,q) and seasonal_order(P,D,Q,s)
         self.order = order
         self.seasonal_order = seasonal_order
@@ -22,6 +26,13 @@ class SARIMAModel(BaseForecastModel):
         self.model = SARIMAX(y, order=self.order, seasonal_order=self.seasonal_order).fit()
         return self.model
 
+    def update(self, X, y):
+        # The state-space results are extended at the fitted parameters
+        new_y = y[self.model.nobs:]  # type: ignore
+        if len(new_y):
+            self.model = self.model.append(new_y)  # type: ignore
+        return self.model
+
     def predict(self, X):
         steps = len(X)
         forecast = self.model.forecast(steps=steps) # type: ignore
@@ -13,6 +13,8 @@ class XGBoostModel(BaseForecastModel):
         Predict future values using the XGBoost model.
     """
 
+    in_sample = 'predict'
+
     def __init__(self):
         self.model = xgb.XGBRegressor()
 
@@ -0,0 +1,47 @@
+import os
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.holtwinters import ExponentialSmoothing
+from models.HoltWintersModel import HoltWintersModel
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASETS = ['sixteen_and_over', 'sixteen_and_sixty_four']
+# Relative amount by which a sum of squared errors may exceed the
+# reference's, the tolerance of the optimizers
+SSE_TOLERANCE = 1e-6
+
+
+def load_series():
+    series = []
+    for dataset in DATASETS:
+        df = pd.read_csv(os.path.join(ROOT, 'processed', f'{dataset}.csv'))
+        # Assuming first three columns are identifiers (Start Date, etc.)
+        for column in df.columns[3:]:
+            series.append((f'{dataset}: {column}', df[column].to_numpy(dtype=float)))
+    return series
+
+
+@pytest.mark.parametrize('seasonal', ['add', 'mul', None])
+def test_default_backend_no_worse_than_statsmodels(seasonal):
+    warnings.simplefilter('ignore')
+    for name, y in load_series():
+        model = HoltWintersModel(trend='add', seasonal=seasonal)
+        model.fit(None, y)
+        baseline = ExponentialSmoothing(y, seasonal_periods=12, trend='add', seasonal=seasonal).fit()
+        assert model.model.sse <= baseline.sse * (1 + SSE_TOLERANCE), name
+
+
+@pytest.mark.parametrize('seasonal', ['add', 'mul', None])
+def test_numpy_backend_no_worse_than_statsmodels_legacy_heuristic(seasonal):
+    # The numpy backend does not estimate the initial states, so it is
+    # compared with statsmodels starting from the same heuristic ones
+    warnings.simplefilter('ignore')
+    for name, y in load_series():
+        model = HoltWintersModel(trend='add', seasonal=seasonal, backend='numpy')
+        model.fit(None, y)
+        sse = np.sum((y - model.model.fittedvalues) ** 2)
+        reference = ExponentialSmoothing(y, seasonal_periods=12, trend='add', seasonal=seasonal,
+                                         initialization_method='legacy-heuristic').fit()
+        assert sse <= reference.sse * (1 + SSE_TOLERANCE), name
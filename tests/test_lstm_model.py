@@ -0,0 +1,65 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('darts')
+from pytorch_lightning.callbacks import EarlyStopping
+from models.LSTMModel import LSTMModel
+
+PERIODS = 48
+STEPS = 12
+
+
+def make_panel(k=3, seed=0):
+    dates = pd.date_range('2000-01-31', periods=PERIODS + STEPS, freq='ME')
+    ordinals = np.array([day.toordinal() for day in dates]).reshape(-1, 1)
+    rng = np.random.default_rng(seed)
+    Y = 10 + np.cumsum(rng.normal(0, 1, (PERIODS, k)), axis=0)
+    return ordinals[:PERIODS], Y, ordinals[PERIODS:]
+
+
+def small_model(**kwargs):
+    return LSTMModel(input_chunk_length=6, output_chunk_length=3, n_epochs=2, global_model=True,
+                     batch_size=16, validation_periods=6, patience=1, **kwargs)
+
+
+def early_stopping(model):
+    return [callback for callback in model.model.trainer_params['callbacks']
+            if isinstance(callback, EarlyStopping)]
+
+
+def test_checkpoint_file_naming():
+    path = os.path.join('results', 'lstm_global.pt')
+    model = LSTMModel(checkpoint_path=path)
+    assert model.checkpoint_file() == path
+    assert model.checkpoint_file('sixteen_and_over') == os.path.join('results', 'lstm_global_sixteen_and_over.pt')
+    assert LSTMModel().checkpoint_file('sixteen_and_over') is None
+
+
+def test_global_fit_and_predict(tmp_path):
+    X, Y, future_X = make_panel()
+    path = str(tmp_path / 'lstm_global.pt')
+    model = small_model(checkpoint_path=path)
+    result = model.forecast_panel(X, Y, future_X, name='a+b')
+
+    assert result['forecast'].shape == (STEPS, Y.shape[1])
+    assert result['fitted'].shape == Y.shape
+    assert np.all(result['lower'] <= result['upper'])
+    # A named panel is saved to its own checkpoint
+    assert os.path.exists(str(tmp_path / 'lstm_global_a+b.pt'))
+    assert not os.path.exists(path)
+
+    loaded = LSTMModel.load(str(tmp_path / 'lstm_global_a+b.pt'))
+    assert loaded.predict_panel(Y, 5).shape == (5, Y.shape[1])
+
+
+def test_each_fit_gets_new_early_stopping():
+    X, Y, _ = make_panel()
+    model = small_model()
+    model.fit_panel(X, Y)
+    first = early_stopping(model)
+    model.fit_panel(X, Y)
+    second = early_stopping(model)
+    assert len(first) == len(second) == 1
+    assert first[0] is not second[0]